@@ -0,0 +1,144 @@
+from django.contrib.auth.models import User
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.leo = User.objects.create_user(username='leo')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Кошки', slug='cats')
+        for num in range(15):
+            Post.objects.create(text=f'Пост {num}', author=cls.leo,
+                                group=cls.group if num % 2 else None)
+        cls.post = Post.objects.latest('pub_date', 'id')
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Мяу')
+        Follow.objects.create(user=cls.reader, author=cls.leo)
+
+    def setUp(self):
+        self.client = Client()
+
+    def get(self, name, *args, **params):
+        response = self.client.get(reverse(f'api:{name}', args=args), params)
+        return response.status_code, response.json()
+
+    def walk(self, name, *args, limit=4):
+        """Проходит ленту по курсорам и возвращает id всех постов."""
+        ids, cursor = [], None
+        while True:
+            params = {'limit': limit}
+            if cursor:
+                params['after'] = cursor
+            status, data = self.get(name, *args, **params)
+            self.assertEqual(status, 200)
+            ids += [post['id'] for post in data['results']]
+            cursor = data['next']
+            if not cursor:
+                return ids
+
+    def test_feeds_walk_in_order(self):
+        """Курсоры проходят каждую ленту целиком в порядке сайта."""
+        self.client.force_login(self.reader)
+        everything = list(Post.objects.values_list('id', flat=True))
+        in_group = list(self.group.posts.values_list('id', flat=True))
+        cases = {
+            ('post_list',): everything,
+            ('group_posts', 'cats'): in_group,
+            ('user_posts', 'leo'): everything,
+            ('follow_posts',): everything,
+        }
+        for args, expected in cases.items():
+            with self.subTest(feed=args[0]):
+                self.assertEqual(self.walk(*args), expected)
+
+    def test_previous_page(self):
+        status, first = self.get('post_list', limit=5)
+        status, second = self.get('post_list', limit=5, after=first['next'])
+        status, back = self.get('post_list', limit=5,
+                                before=second['previous'])
+        self.assertEqual(back['results'], first['results'])
+
+    def test_post_fields(self):
+        status, data = self.get('post_list', limit=1)
+        self.assertEqual(data['results'][0], {
+            'id': self.post.id,
+            'text': self.post.text,
+            'pub_date': data['results'][0]['pub_date'],
+            'author': 'leo',
+            'group': None,
+            'image': None,
+            'comments_count': 1,
+        })
+
+    def test_post_detail_with_comments(self):
+        status, data = self.get('post_detail', self.post.id)
+        self.assertEqual(status, 200)
+        self.assertEqual([(c['author'], c['text']) for c in data['comments']],
+                         [('reader', 'Мяу')])
+
+    def test_post_comments_walk_by_cursor(self):
+        """Комментарии отдаются страницами по (created, id), от старых
+        к новым, и проходятся курсорами в обе стороны."""
+        post = Post.objects.earliest('pub_date', 'id')
+        Comment.objects.bulk_create([
+            Comment(post=post, author=self.reader, text=f'Коммент {num}')
+            for num in range(7)])
+        # одинаковое время: порядок держит id
+        Comment.objects.filter(post=post).update(created=post.pub_date)
+        ids, cursor, pages = [], None, []
+        while True:
+            params = {'limit': 3}
+            if cursor:
+                params['after'] = cursor
+            status, data = self.get('post_detail', post.id, **params)
+            self.assertEqual(status, 200)
+            pages.append(data)
+            ids += [comment['id'] for comment in data['comments']]
+            cursor = data['comments_next']
+            if not cursor:
+                break
+        self.assertEqual(ids, sorted(Comment.objects.filter(
+            post=post).values_list('id', flat=True)))
+        self.assertEqual(len(pages), 3)
+        status, back = self.get('post_detail', post.id, limit=3,
+                                before=pages[1]['comments_previous'])
+        self.assertEqual(back['comments'], pages[0]['comments'])
+        self.assertIsNone(back['comments_previous'])
+
+    def test_not_found(self):
+        for args in (('post_detail', 0), ('group_posts', 'dogs'),
+                     ('user_posts', 'nobody')):
+            with self.subTest(endpoint=args[0]):
+                status, data = self.get(*args)
+                self.assertEqual(status, 404)
+                self.assertIn('detail', data)
+
+    def test_follow_requires_login(self):
+        status, data = self.get('follow_posts')
+        self.assertEqual(status, 401)
+
+    def test_read_only(self):
+        response = self.client.post(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_limit_is_capped(self):
+        status, data = self.get('post_list', limit=1000)
+        self.assertEqual(len(data['results']), 15)
+        status, data = self.get('post_list', limit='abc')
+        self.assertEqual(len(data['results']), 10)
+
+    @override_settings(DEBUG=True)
+    def test_debug_query_count(self):
+        """Страница ленты — один запрос, пост с комментариями — два."""
+        status, data = self.get('post_list')
+        self.assertEqual(data['debug'], {'queries': 1})
+        status, data = self.get('post_detail', self.post.id)
+        self.assertEqual(data['debug'], {'queries': 2})
+
+    def test_no_debug_without_debug(self):
+        status, data = self.get('post_list')
+        self.assertNotIn('debug', data)
@@ -0,0 +1,154 @@
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.models import F
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from posts.models import Comment, Group, Post
+from posts.pagination import (COMMENTS_PAGE_SIZE, PAGE_SIZE,
+                              CursorPaginator, encode_cursor)
+from yatube.metrics import QueryCounter
+
+User = get_user_model()
+
+MAX_LIMIT = 100
+
+# ключ в ответе -> колонка для values_list
+POST_COLUMNS = (
+    ('id', 'id'),
+    ('text', 'text'),
+    ('pub_date', 'pub_date'),
+    ('author', 'author__username'),
+    ('group', 'group__slug'),
+    ('image', 'image'),
+    ('comments_count', 'comments_count'),
+)
+COMMENT_COLUMNS = (
+    ('id', 'id'),
+    ('text', 'text'),
+    ('created', 'created'),
+    ('author', 'author__username'),
+)
+POST_KEYS = tuple(key for key, column in POST_COLUMNS)
+COMMENT_KEYS = tuple(key for key, column in COMMENT_COLUMNS)
+PUB_DATE = POST_KEYS.index('pub_date')
+CREATED = COMMENT_KEYS.index('created')
+
+
+class RowCursorPaginator(CursorPaginator):
+    """Курсоры по кортежам из values_list, а не по экземплярам Post."""
+    position = PUB_DATE
+
+    def cursor_for(self, row):
+        return encode_cursor(row[self.position], row[0])
+
+
+class CommentCursorPaginator(RowCursorPaginator):
+    """Комментарии по (created, id), от старых к новым."""
+    field = 'created'
+    descending = False
+    position = CREATED
+
+
+def post_rows(queryset):
+    return queryset.values_list(*(column for key, column in POST_COLUMNS))
+
+
+def serialize_post(row):
+    post = dict(zip(POST_KEYS, row))
+    post['image'] = (default_storage.url(post['image'])
+                     if post['image'] else None)
+    return post
+
+
+def api_view(view):
+    """GET-only view, которое в DEBUG добавляет к ответу число запросов."""
+
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            data, status = view(request, *args, **kwargs)
+        if settings.DEBUG:
+            data['debug'] = {'queries': counter.count}
+        return JsonResponse(data, status=status)
+    return wrapper
+
+
+def cursor_page(request, paginator_class, rows, per_page, ordering=None):
+    """Страница по ?after=/?before= и ?limit= (не больше MAX_LIMIT)."""
+    try:
+        limit = min(int(request.GET.get('limit', per_page)), MAX_LIMIT)
+    except ValueError:
+        limit = per_page
+    paginator = paginator_class(rows, max(limit, 1), ordering)
+    return paginator.page(after=request.GET.get('after'),
+                          before=request.GET.get('before'))
+
+
+def feed_page(request, queryset, ordering=None):
+    page = cursor_page(request, RowCursorPaginator, post_rows(queryset),
+                       PAGE_SIZE, ordering)
+    return {
+        'results': [serialize_post(row) for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }, 200
+
+
+@api_view
+def post_list(request):
+    return feed_page(request, Post.objects.all())
+
+
+@api_view
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'id', flat=True).first()
+    if group_id is None:
+        return {'detail': 'Группа не найдена.'}, 404
+    return feed_page(request, Post.objects.filter(group_id=group_id))
+
+
+@api_view
+def user_posts(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'id', flat=True).first()
+    if author_id is None:
+        return {'detail': 'Пользователь не найден.'}, 404
+    return feed_page(request, Post.objects.filter(author_id=author_id))
+
+
+@api_view
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        return {'detail': 'Нужна авторизация.'}, 401
+    # как posts.views.follow_index: страницы по индексу записей ленты
+    return feed_page(request, Post.objects.filter(
+        timeline_entries__user=request.user).annotate(
+        feed_date=F('timeline_entries__pub_date'),
+        feed_post=F('timeline_entries__post')), ('feed_date', 'feed_post'))
+
+
+@api_view
+def post_detail(request, post_id):
+    row = post_rows(Post.objects.filter(pk=post_id)).first()
+    if row is None:
+        return {'detail': 'Пост не найден.'}, 404
+    post = serialize_post(row)
+    # комментарии листаются теми же курсорами, что и ленты:
+    # ?after=/?before= и ?limit= относятся к ним
+    page = cursor_page(
+        request, CommentCursorPaginator,
+        Comment.objects.filter(post_id=post_id).values_list(
+            *(column for key, column in COMMENT_COLUMNS)),
+        COMMENTS_PAGE_SIZE)
+    post['comments'] = [dict(zip(COMMENT_KEYS, comment)) for comment in page]
+    post['comments_next'] = page.next_cursor
+    post['comments_previous'] = page.previous_cursor
+    return post, 200
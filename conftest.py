@@ -0,0 +1,14 @@
+import tempfile
+
+import pytest
+from django.test.utils import override_settings
+
+from yatube.testing import overrides
+
+
+@pytest.fixture(scope='session', autouse=True)
+def yatube_test_settings():
+    """Те же подмены настроек, что у manage.py test."""
+    with tempfile.TemporaryDirectory() as directory, \
+            override_settings(**overrides(directory)):
+        yield
@@ -0,0 +1,75 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import transaction
+
+from yatube.routers import reading_replica
+
+
+def _key(name):
+    return f'posts:version:{name}'
+
+
+def _initial():
+    # после вытеснения ключа версия не должна совпасть ни с одной прежней
+    return time.time_ns()
+
+
+def get_version(name):
+    key = _key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial(), None)
+        version = cache.get(key)
+    return version
+
+
+def can_store():
+    """Можно ли сохранять в кеш то, что помечено текущей версией.
+
+    Запрос с реплики мог увидеть новую версию раньше новых данных: собранное
+    им под этой версией осталось бы старым до следующего сдвига."""
+    return not reading_replica()
+
+
+def get_changed_at(*names):
+    """Время последнего сдвига любой из версий (для Last-Modified)."""
+    keys = [f'{_key(name)}:changed' for name in names]
+    stamps = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in stamps}
+    if missing:
+        # время потеряно — считаем, что всё изменилось только что
+        cache.set_many(missing, None)
+        stamps.update(missing)
+    return datetime.fromtimestamp(max(stamps.values()), tz=timezone.utc)
+
+
+def _bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial(), None)
+    now = time.time()
+    cache.set_many({f'{key}:changed': now for key in keys}, None)
+
+
+def bump_versions(*names):
+    """Сдвигает версии сразу и ещё раз после коммита транзакции:
+    фрагмент, собранный параллельным запросом до коммита, не переживёт её."""
+    keys = [_key(name) for name in names]
+    if not keys:
+        return
+    _bump(keys)
+    transaction.on_commit(lambda: _bump(keys))
+
+
+# посты, комментарии и группы: всё, что видно на главной
+CONTENT = 'content'
+# подписки: кнопки и счётчики в карточке автора
+FOLLOWS = 'follows'
+
+
+def feed_version_name(user_id):
+    return f'feed:{user_id}'
@@ -0,0 +1,72 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+
+from .caching import (CONTENT, FOLLOWS, can_store, get_changed_at,
+                      get_version)
+from .models import Comment, Post
+
+
+def _newest(queryset, field):
+    return queryset.order_by(f'-{field}').values_list(field, flat=True).first()
+
+
+def newest_in_group(slug):
+    return _newest(Post.objects.filter(group__slug=slug), 'pub_date')
+
+
+def newest_by_author(username):
+    return _newest(Post.objects.filter(author__username=username), 'pub_date')
+
+
+def newest_in_post(username, post_id):
+    last_comment = Comment.objects.filter(post_id=OuterRef('pk')).order_by(
+        '-created').values('created')[:1]
+    row = Post.objects.filter(pk=post_id).values_list(
+        'pub_date', Subquery(last_comment)).first()
+    return max(filter(None, row), default=None) if row else None
+
+
+def conditional_page(newest, versions):
+    """ETag и Last-Modified страницы без запуска view.
+
+    newest(**kwargs) — время самой свежей записи на странице (один
+    индексный запрос); правки, которые его не меняют, учитываются через
+    версии из кеша. В ETag входят пользователь и CSRF-кука, потому что
+    от них зависит разметка. Ответ с реплики валидаторов не получает:
+    браузер хранил бы старую страницу под новой версией."""
+
+    def validators(request, **kwargs):
+        if not can_store():
+            return None, None
+        if not hasattr(request, '_page_validators'):
+            newest_stamp = newest(**kwargs)
+            changed = get_changed_at(*versions)
+            parts = [
+                request.get_full_path(),
+                request.user.pk,
+                request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+                newest_stamp,
+                *[get_version(name) for name in versions],
+            ]
+            etag = hashlib.md5(repr(parts).encode()).hexdigest()
+            last_modified = max(filter(None, (newest_stamp, changed)))
+            request._page_validators = (etag, last_modified)
+        return request._page_validators
+
+    def decorator(view):
+        return vary_on_cookie(condition(
+            etag_func=lambda request, **kwargs: validators(
+                request, **kwargs)[0],
+            last_modified_func=lambda request, **kwargs: validators(
+                request, **kwargs)[1],
+        )(view))
+    return decorator
+
+
+group_condition = conditional_page(newest_in_group, (CONTENT,))
+profile_condition = conditional_page(newest_by_author, (CONTENT, FOLLOWS))
+post_condition = conditional_page(newest_in_post, (CONTENT, FOLLOWS))
@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+# (модель, поле-счётчик, считаемая модель, внешний ключ на модель)
+COUNTERS = (
+    (Post, 'comments_count', Comment, 'post'),
+    (Group, 'posts_count', Post, 'group'),
+    (UserStats, 'posts_count', Post, 'author'),
+    (UserStats, 'followers_count', Follow, 'author'),
+    (UserStats, 'following_count', Follow, 'user'),
+)
+
+
+def change(model, pk, **deltas):
+    """Атомарно сдвигает счётчики строки одним UPDATE."""
+    if pk is None:
+        return
+    model.objects.filter(pk=pk).update(
+        **{field: F(field) + delta for field, delta in deltas.items()})
+
+
+def actual_count(related, fk):
+    return Coalesce(Subquery(
+        related.objects.filter(**{fk: OuterRef('pk')})
+        .order_by().values(fk).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def create_missing_stats():
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True)
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=pk) for pk in missing.iterator()],
+        batch_size=500)
+
+
+def rebuild():
+    create_missing_stats()
+    for model, field, related, fk in COUNTERS:
+        model.objects.update(**{field: actual_count(related, fk)})
+
+
+def mismatches():
+    """Возвращает [(модель, поле, число расходящихся строк)]."""
+    result = []
+    for model, field, related, fk in COUNTERS:
+        wrong = model.objects.annotate(
+            actual=actual_count(related, fk)).exclude(**{field: F('actual')})
+        result.append((model, field, wrong.count()))
+    missing = User.objects.filter(stats__isnull=True).count()
+    result.append((UserStats, 'user', missing))
+    return result
@@ -0,0 +1,162 @@
+import json
+import math
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+
+from posts import urls
+from posts.models import Group, Post
+from yatube.metrics import QueryCounter
+
+User = get_user_model()
+
+METRICS = ('p50', 'p95', 'p99', 'queries', 'bytes')
+# адреса, принимающие только POST, и данные для них
+POST_DATA = {
+    'ajax_follow': {},
+    'ajax_unfollow': {},
+    'ajax_comment': {'text': 'Замер'},
+}
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    rank = max(math.ceil(share / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Command(BaseCommand):
+    help = ('Прогоняет все адреса posts.urls на текущей базе и печатает '
+            'p50/p95/p99 времени ответа, число запросов и размер ответа. '
+            'Все изменения (подписки, сессии) откатываются. Данные для '
+            'замеров — manage.py seed_data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Запросов на адрес')
+        parser.add_argument('--warmup', type=int, default=3,
+                            help='Прогревочных запросов (не учитываются)')
+        parser.add_argument('--anonymous', action='store_true',
+                            help='Без входа в систему')
+        parser.add_argument('--save', metavar='PATH',
+                            help='Сохранить результаты как базовые')
+        parser.add_argument('--compare', metavar='PATH',
+                            help='Сравнить с сохранёнными базовыми')
+        parser.add_argument('--threshold', type=float, default=20,
+                            help='Допустимый рост p95, в процентах')
+
+    def handle(self, *args, **options):
+        targets = self.targets()
+        with transaction.atomic():
+            client = Client(enforce_csrf_checks=True)
+            if not options['anonymous']:
+                client.force_login(self.viewer)
+            # страница входа выставляет cookie с CSRF-токеном для POST
+            client.get(reverse('login'))
+            results = {name: self.measure(client, url, data, options)
+                       for name, url, data in targets}
+            transaction.set_rollback(True)
+        self.report(results)
+        if options['save']:
+            with open(options['save'], 'w') as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+            self.stdout.write(f'Базовые результаты сохранены в {options["save"]}')
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+            regressions = self.compare(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError(f'Регрессии: {", ".join(regressions)}')
+
+    def targets(self):
+        post = Post.objects.order_by(
+            '-author__stats__followers_count', '-pub_date').first()
+        group = Group.objects.order_by('-posts_count').first()
+        if post is None or group is None:
+            raise CommandError('База пуста: сначала manage.py seed_data')
+        self.viewer = User.objects.exclude(pk=post.author_id).order_by(
+            '-stats__following_count').first()
+        own_post = (Post.objects.filter(author=self.viewer).first()
+                    if self.viewer else None) or post
+        samples = {
+            'username': post.author.username,
+            'post_id': post.pk,
+            'slug': group.slug,
+        }
+        # править можно только свой пост
+        overrides = {'post_edit': {'username': own_post.author.username,
+                                   'post_id': own_post.pk}}
+        queries = {'search': '?q=' + post.text.split()[0]}
+        targets = []
+        for pattern in urls.urlpatterns:
+            kwargs = {name: samples[name] for name in pattern.pattern.converters}
+            kwargs.update(overrides.get(pattern.name, {}))
+            url = reverse(f'{urls.app_name}:{pattern.name}', kwargs=kwargs)
+            targets.append((pattern.name, url + queries.get(pattern.name, ''),
+                            POST_DATA.get(pattern.name)))
+        return targets
+
+    def measure(self, client, url, data, options):
+        """Замеряет адрес: GET, а для data не None — POST с CSRF-токеном."""
+        if data is None:
+            def request():
+                return client.get(url)
+        else:
+            token = client.cookies[settings.CSRF_COOKIE_NAME].value
+
+            def request():
+                return client.post(url, data, HTTP_X_CSRFTOKEN=token)
+        for _ in range(options['warmup']):
+            request()
+        timings = []
+        for _ in range(options['requests']):
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                response = request()
+                timings.append((time.perf_counter() - start) * 1000)
+        return {
+            'url': url,
+            'status': response.status_code,
+            'p50': round(percentile(timings, 50), 3),
+            'p95': round(percentile(timings, 95), 3),
+            'p99': round(percentile(timings, 99), 3),
+            'queries': counter.count,
+            'bytes': len(response.content),
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"view":<18}{"status":>7}{"p50 ms":>10}{"p95 ms":>10}'
+            f'{"p99 ms":>10}{"queries":>9}{"bytes":>9}')
+        for name, row in results.items():
+            self.stdout.write(
+                f'{name:<18}{row["status"]:>7}{row["p50"]:>10.2f}'
+                f'{row["p95"]:>10.2f}{row["p99"]:>10.2f}'
+                f'{row["queries"]:>9}{row["bytes"]:>9}')
+
+    def compare(self, results, baseline, threshold):
+        regressions = []
+        self.stdout.write('\nИзменения относительно базовых:')
+        for name, row in results.items():
+            base = baseline.get(name)
+            if base is None:
+                self.stdout.write(f'{name:<18} нет в базовых')
+                continue
+            changes = []
+            for metric in METRICS:
+                before, after = base[metric], row[metric]
+                delta = (after - before) / before * 100 if before else 0
+                changes.append(f'{metric} {before}→{after} ({delta:+.0f}%)')
+            self.stdout.write(f'{name:<18}' + ', '.join(changes))
+            p95_growth = ((row['p95'] - base['p95']) / base['p95'] * 100
+                          if base['p95'] else 0)
+            if p95_growth > threshold or row['queries'] > base['queries']:
+                regressions.append(name)
+        return regressions
@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from yatube.cache import SQLiteCache
+
+KEYS = 1000
+# примерно фрагмент ленты из десяти карточек
+VALUE = 'x' * 2048
+
+BACKENDS = {
+    'locmem': lambda directory, params: LocMemCache('benchmark', params),
+    'filebased': lambda directory, params: FileBasedCache(
+        os.path.join(directory, 'files'), params),
+    'sqlite': lambda directory, params: SQLiteCache(
+        os.path.join(directory, 'cache.sqlite3'), params),
+}
+# видит ли процесс запись, сделанную другим
+SHARED = {'locmem': 'нет', 'filebased': 'да', 'sqlite': 'да'}
+
+
+def _get(cache, rnd):
+    cache.get(f'key{rnd.randrange(KEYS)}')
+
+
+def _set(cache, rnd):
+    cache.set(f'key{rnd.randrange(KEYS)}', VALUE)
+
+
+def _incr(cache, rnd):
+    cache.incr('counter')
+
+
+def _get_many(cache, rnd):
+    cache.get_many([f'key{rnd.randrange(KEYS)}' for _ in range(10)])
+
+
+def _mixed(cache, rnd):
+    # как на сайте: чтений на порядок больше, чем записей
+    (_set if rnd.random() < 0.1 else _get)(cache, rnd)
+
+
+OPERATIONS = {'get': _get, 'get_many': _get_many, 'set': _set,
+              'incr': _incr, 'mixed': _mixed}
+
+
+def _run_worker(args):
+    name, directory, params, operation, deadline, seed = args
+    cache = BACKENDS[name](directory, params)
+    rnd = random.Random(seed)
+    step = OPERATIONS[operation]
+    done = 0
+    while time.monotonic() < deadline:
+        step(cache, rnd)
+        done += 1
+    return done
+
+
+class Command(BaseCommand):
+    help = ('Пропускная способность кеш-бэкендов: LocMemCache, '
+            'FileBasedCache и SQLiteCache из yatube/cache.py, операций в '
+            'секунду по всем процессам.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=2)
+        parser.add_argument('--backends', nargs='+', choices=BACKENDS,
+                            default=list(BACKENDS))
+        parser.add_argument('--operations', nargs='+', choices=OPERATIONS,
+                            default=list(OPERATIONS))
+
+    def handle(self, *args, **options):
+        params = {'OPTIONS': {'MAX_ENTRIES': KEYS * 2}, 'TIMEOUT': None}
+        self.stdout.write(f'{"бэкенд":<10}{"общий":>6}' + ''.join(
+            f'{operation:>10}' for operation in options['operations'])
+            + f'{"потеряно incr":>15}')
+        context = multiprocessing.get_context('fork')
+        for name in options['backends']:
+            row = f'{name:<10}{SHARED[name]:>6}'
+            with tempfile.TemporaryDirectory() as directory:
+                cache = BACKENDS[name](directory, params)
+                cache.set_many({f'key{num}': VALUE for num in range(KEYS)})
+                for operation in options['operations']:
+                    cache.set('counter', 0)
+                    deadline = time.monotonic() + options['seconds']
+                    jobs = [(name, directory, params, operation, deadline,
+                             seed) for seed in range(options['processes'])]
+                    with context.Pool(len(jobs)) as pool:
+                        results = pool.map(_run_worker, jobs)
+                    total = sum(results)
+                    row += f'{total / options["seconds"]:>10.0f}'
+                    if operation == 'incr':
+                        # счётчик, видный родителю, должен совпасть с числом
+                        # incr во всех процессах
+                        lost = total - cache.get('counter')
+                if 'incr' not in options['operations']:
+                    lost = '—'
+                row += f'{lost:>15}'
+            self.stdout.write(row)
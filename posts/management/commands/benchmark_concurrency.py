@@ -0,0 +1,216 @@
+import copy
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+from .benchmark import percentile
+
+User = get_user_model()
+
+# штатный SQLite: журнал отката, без PRAGMA, соединение на каждый запрос
+STOCK = {'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': 0,
+         'OPTIONS': {}}
+
+
+def copy_database(path, journal_mode):
+    """Копия текущей базы, чтобы оба режима начинали с одних данных."""
+    source = connections['default']
+    source.ensure_connection()
+    target = sqlite3.connect(path)
+    source.connection.backup(target)
+    target.execute(f'PRAGMA journal_mode = {journal_mode}')
+    target.close()
+
+
+@contextmanager
+def use_database(config):
+    """Новые соединения (и в дочерних процессах) открываются с config."""
+    def switch(settings_dict):
+        connections.close_all()
+        connections.databases['default'] = settings_dict
+        if hasattr(connections._connections, 'default'):
+            del connections['default']
+
+    saved = connections.databases['default']
+    switch({**saved, **config})
+    try:
+        yield
+    finally:
+        switch(saved)
+
+
+@contextmanager
+def use_cache(directory, name):
+    """Пустой кеш в directory на время режима name.
+
+    Общий кеш сайта бенчмарк не трогает: его записи сдвигали бы версии и
+    оставляли фрагменты с данными копии базы. А с одним кешем на оба режима
+    второй начинал бы с прогретыми сессиями, счётчиками и фрагментами."""
+    caches = copy.deepcopy(settings.CACHES)
+    for alias, config in caches.items():
+        config['LOCATION'] = os.path.join(directory,
+                                          f'{name}-cache-{alias}.sqlite3')
+    # override_settings заново создаёт и бэкенды кеша
+    with override_settings(CACHES=caches):
+        yield
+
+
+class Worker:
+    """Один процесс, как воркер gunicorn: свои соединения и свой кеш."""
+
+    def __init__(self, user_id, targets, deadline, write_ratio, seed):
+        self.user_id = user_id
+        self.targets = targets
+        self.deadline = deadline
+        self.write_ratio = write_ratio
+        self.random = random.Random(seed)
+        self.following = False
+        self.timings = {'read': [], 'write': []}
+        self.errors = 0
+
+    def request(self, client):
+        targets = self.targets
+        if self.random.random() >= self.write_ratio:
+            client.get(self.random.choice(targets['reads']))
+            return 'read'
+        if self.random.random() < 0.5:
+            client.post(targets['comment'], {'text': 'Нагрузка'})
+        else:
+            client.get(targets['unfollow' if self.following else 'follow'])
+            self.following = not self.following
+        return 'write'
+
+    def run(self):
+        client = Client()
+        try:
+            client.force_login(User.objects.get(pk=self.user_id))
+            while time.monotonic() < self.deadline:
+                start = time.monotonic()
+                try:
+                    kind = self.request(client)
+                except DatabaseError:
+                    self.errors += 1
+                    continue
+                finally:
+                    # как в конце настоящего запроса: CONN_MAX_AGE решает,
+                    # закрыть ли соединение
+                    close_old_connections()
+                self.timings[kind].append(time.monotonic() - start)
+        finally:
+            connections.close_all()
+        return self.timings, self.errors
+
+
+def _run_worker(args):
+    return Worker(*args).run()
+
+
+class Command(BaseCommand):
+    help = ('Смешанная нагрузка чтением и записью из нескольких процессов на '
+            'копии текущей базы: штатный SQLite против настроек из '
+            'settings.DATABASES (WAL, busy_timeout, CONN_MAX_AGE). '
+            'Данные — manage.py seed_data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--write-ratio', type=float, default=0.2,
+                            help='Доля запросов на запись')
+        parser.add_argument('--mode', choices=('stock', 'tuned', 'both'),
+                            default='both')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Сравнение имеет смысл только для SQLite')
+        targets = self.targets()
+        users = list(User.objects.exclude(
+            username=targets['author']).order_by('pk').values_list(
+            'pk', flat=True)[:options['workers']])
+        if len(users) < options['workers']:
+            raise CommandError('Пользователей меньше, чем процессов: '
+                               'сначала manage.py seed_data')
+        tuned = {key: settings.DATABASES['default'][key]
+                 for key in ('ENGINE', 'CONN_MAX_AGE', 'OPTIONS')}
+        modes = [('stock', STOCK, 'delete'), ('tuned', tuned, 'wal')]
+        if options['mode'] != 'both':
+            modes = [mode for mode in modes if mode[0] == options['mode']]
+        self.stdout.write(
+            f'{"режим":<8}{"запр/с":>9}{"чтение/с":>10}{"запись/с":>10}'
+            f'{"p95 чт, мс":>12}{"p95 зап, мс":>13}{"ошибок":>8}')
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for name, config, journal_mode in modes:
+                path = os.path.join(directory, f'{name}.sqlite3')
+                copy_database(path, journal_mode)
+                with use_database({**config, 'NAME': path}), \
+                        use_cache(directory, name):
+                    results[name] = self.run(users, targets, options)
+                self.report(name, results[name], options['seconds'])
+        if len(results) == 2 and results['stock']['total']:
+            gain = results['tuned']['total'] / results['stock']['total']
+            self.stdout.write(f'Прирост пропускной способности: x{gain:.2f}')
+
+    def targets(self):
+        post = Post.objects.select_related('author').order_by(
+            '-pub_date').first()
+        group = Group.objects.order_by('-posts_count').first()
+        if post is None:
+            raise CommandError('База пуста: сначала manage.py seed_data')
+        username = post.author.username
+        reads = [reverse('posts:index'),
+                 reverse('posts:index') + '?page=2',
+                 reverse('posts:follow_index'),
+                 reverse('posts:profile', args=[username]),
+                 reverse('posts:post', args=[username, post.pk])]
+        if group is not None:
+            reads.append(reverse('posts:group_posts', args=[group.slug]))
+        return {
+            'author': username,
+            'reads': reads,
+            'comment': reverse('posts:add_comment', args=[username, post.pk]),
+            'follow': reverse('posts:profile_follow', args=[username]),
+            'unfollow': reverse('posts:profile_unfollow', args=[username]),
+        }
+
+    def run(self, users, targets, options):
+        # fork: дети наследуют подменённые настройки базы, но не соединения
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        deadline = time.monotonic() + options['seconds']
+        jobs = [(user_id, targets, deadline, options['write_ratio'], seed)
+                for seed, user_id in enumerate(users)]
+        with context.Pool(len(jobs)) as pool:
+            results = pool.map(_run_worker, jobs)
+        reads = [t for timings, _ in results for t in timings['read']]
+        writes = [t for timings, _ in results for t in timings['write']]
+        return {
+            'total': len(reads) + len(writes),
+            'reads': reads,
+            'writes': writes,
+            'errors': sum(errors for _, errors in results),
+        }
+
+    def report(self, name, result, seconds):
+        def p95(values):
+            return percentile(values, 95) * 1000 if values else 0
+
+        self.stdout.write(
+            f'{name:<8}{result["total"] / seconds:>9.1f}'
+            f'{len(result["reads"]) / seconds:>10.1f}'
+            f'{len(result["writes"]) / seconds:>10.1f}'
+            f'{p95(result["reads"]):>12.1f}{p95(result["writes"]):>13.1f}'
+            f'{result["errors"]:>8}')
@@ -0,0 +1,83 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.template import Context, Engine, engines
+from django.utils import timezone
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+# карточка через inclusion tag с готовыми адресами
+PAGE = ('{% load post_tags %}'
+        '{% for post in page %}{% post_card post %}{% endfor %}')
+# та же карточка через {% include %}: адреса считает {% url %} на каждой
+PAGE_INCLUDE = (
+    '{% for post in page %}{% with group_url="" edit_url="" %}'
+    '{% url "posts:profile" post.author.username as profile_url %}'
+    '{% url "posts:post" post.author.username post.id as post_url %}'
+    '{% if post.group %}'
+    '{% url "posts:group_posts" post.group.slug as group_url %}'
+    '{% endif %}'
+    '{% if post.author_id == user.pk %}'
+    '{% url "posts:post_edit" post.author.username post.id as edit_url %}'
+    '{% endif %}'
+    '{% include "post_item.html" with username=post.author.username %}'
+    '{% endwith %}{% endfor %}')
+PAGES = {'post_card': PAGE, 'include': PAGE_INCLUDE}
+
+PLAIN_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+LOADERS = {
+    'plain': PLAIN_LOADERS,
+    'cached': [('django.template.loaders.cached.Loader', PLAIN_LOADERS)],
+}
+
+
+def make_posts(count):
+    """Посты в памяти, без базы: замеряется только рендер."""
+    now = timezone.now()
+    authors = [User(id=num, username=f'author{num}') for num in range(1, 6)]
+    group = Group(id=1, title='Группа', slug='group')
+    return [
+        Post(id=num, text='Первая строка\nвторая строка ' * 5,
+             author=authors[num % len(authors)],
+             group=group if num % 2 else None,
+             pub_date=now, comments_count=num % 3)
+        for num in range(1, count + 1)
+    ]
+
+
+class Command(BaseCommand):
+    help = ('Микробенчмарк рендера ленты: время страницы из 10 и 100 '
+            'карточек постов через {% post_card %} и через {% include %}, '
+            'с обычным и кеширующим загрузчиком шаблонов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, nargs='+', default=[10, 100])
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        base = engines['django'].engine
+        user = User(id=1, username='author1')
+        self.stdout.write(f'{"карточек":>9}{"шаблон":>11}{"загрузчик":>11}'
+                          f'{"мс/стр.":>10}')
+        for cards in options['cards']:
+            context = {'page': make_posts(cards), 'user': user}
+            for page, source in PAGES.items():
+                for name, loaders in LOADERS.items():
+                    engine = Engine(dirs=base.dirs, loaders=loaders,
+                                    libraries=base.libraries)
+                    template = engine.from_string(source)
+                    template.render(Context(context))
+                    timings = []
+                    for _ in range(options['repeat']):
+                        start = time.perf_counter()
+                        template.render(Context(context))
+                        timings.append((time.perf_counter() - start) * 1000)
+                    self.stdout.write(f'{cards:>9}{page:>11}{name:>11}'
+                                      f'{statistics.median(timings):>10.3f}')
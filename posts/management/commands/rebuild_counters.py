@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики постов, групп и пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить счётчики, ничего не меняя')
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            counters.rebuild()
+        broken = 0
+        for model, field, wrong in counters.mismatches():
+            if wrong:
+                broken += wrong
+                self.stderr.write(
+                    f'{model._meta.label}.{field}: расходится {wrong}')
+        if broken:
+            raise CommandError(f'Неверных счётчиков: {broken}')
+        self.stdout.write(self.style.SUCCESS('Счётчики в порядке'))
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import Follow, TimelineEntry
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Заново собирает материализованные ленты подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*',
+                            help='Только ленты этих пользователей')
+
+    def handle(self, *args, **options):
+        if options['usernames']:
+            user_ids = list(User.objects.filter(
+                username__in=options['usernames']).values_list('pk', flat=True))
+        else:
+            TimelineEntry.objects.all().delete()
+            user_ids = list(Follow.objects.values_list(
+                'user_id', flat=True).distinct())
+        for user_id in user_ids:
+            timeline.rebuild(user_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересобрано лент: {len(user_ids)}'))
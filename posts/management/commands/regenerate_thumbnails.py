@@ -0,0 +1,60 @@
+import os
+from multiprocessing import Pool
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def _init_worker():
+    # при spawn дочерний процесс стартует без настроенного Django,
+    # при fork нельзя пользоваться унаследованными соединениями с БД
+    django.setup()
+    connections.close_all()
+
+
+def _regenerate(job):
+    name, force = job
+    try:
+        return name, thumbnails.regenerate(name, force)
+    except Exception as error:
+        return name, f'failed: {error}'
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ('Создаёт миниатюры всех картинок постов параллельно во всех ядрах. '
+            'Готовые и свежие миниатюры пропускаются, поэтому прерванный '
+            'запуск можно просто повторить.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Число процессов (по умолчанию — число ядер)')
+        parser.add_argument('--force', action='store_true',
+                            help='Пересоздать даже свежие миниатюры')
+        parser.add_argument('--chunksize', type=int, default=16)
+
+    def handle(self, *args, **options):
+        names = list(Post.objects.exclude(image='').exclude(image=None)
+                     .order_by().values_list('image', flat=True).distinct())
+        total = len(names)
+        stats = {}
+        jobs = [(name, options['force']) for name in names]
+        connections.close_all()
+        with Pool(options['workers'], initializer=_init_worker) as pool:
+            results = pool.imap_unordered(_regenerate, jobs,
+                                          chunksize=options['chunksize'])
+            for done, (name, status) in enumerate(results, 1):
+                kind = status.split(':')[0]
+                stats[kind] = stats.get(kind, 0) + 1
+                if kind == 'failed':
+                    self.stderr.write(f'\n{name}: {status}')
+                self.stdout.write(f'\r{done}/{total}', ending='')
+                self.stdout.flush()
+        summary = ', '.join(f'{kind}: {count}'
+                            for kind, count in sorted(stats.items()))
+        self.stdout.write(f'\nГотово. {summary or "картинок нет"}')
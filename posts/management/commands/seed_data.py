@@ -0,0 +1,191 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image
+
+from posts import counters, timeline, trending
+from posts.caching import CONTENT, FOLLOWS, bump_versions
+from posts.models import Comment, Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+# SQLite собирает bulk INSERT из UNION ALL, а в нём не больше 500 частей
+BATCH_SIZE = 500
+WORDS = ('лес', 'река', 'город', 'кошка', 'поезд', 'весна', 'письмо', 'окно',
+         'дорога', 'снег', 'книга', 'море', 'утро', 'дом', 'песня', 'ветер')
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Отключает auto_now_add, чтобы bulk_create сохранил заданные даты."""
+    saved = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, saved):
+            field.auto_now_add = value
+
+
+def make_text(rnd, words):
+    return ' '.join(rnd.choice(WORDS) for _ in range(words)).capitalize()
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими данными для нагрузочных замеров: '
+            'пользователи, посты с картинками и без, комментарии и подписки '
+            'со степенным распределением популярности авторов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--follows', type=int, default=20,
+                            help='Среднее число подписок на пользователя')
+        parser.add_argument('--images', type=float, default=0.2,
+                            help='Доля постов с картинкой')
+        parser.add_argument('--alpha', type=float, default=1.2,
+                            help='Показатель степенного закона популярности')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней раскидать даты публикаций')
+        parser.add_argument('--prefix', default='seed',
+                            help='Префикс имён пользователей и групп')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        prefix = options['prefix']
+        with transaction.atomic():
+            users = self.create_users(prefix, options['users'])
+            groups = self.create_groups(prefix, options['groups'])
+            images = self.create_images(rnd, prefix) if options['images'] else []
+            # популярность автора ~ 1 / rank ** alpha
+            weights = [1 / (rank ** options['alpha'])
+                       for rank in range(1, len(users) + 1)]
+            posts = self.create_posts(rnd, options, users, weights, groups,
+                                      images, prefix)
+            comments = self.create_comments(rnd, options['comments'], users,
+                                            posts)
+            follows = self.create_follows(rnd, options['follows'], users,
+                                          weights)
+            counters.rebuild()
+            self.build_timelines()
+            trending.rebuild()
+            bump_versions(CONTENT, FOLLOWS)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(users)}, групп {len(groups)}, '
+            f'постов {len(posts)}, комментариев {comments}, '
+            f'подписок {follows}'))
+
+    def create_users(self, prefix, count):
+        password = make_password(prefix)
+        User.objects.bulk_create(
+            [User(username=f'{prefix}{num}', password=password)
+             for num in range(count)],
+            batch_size=BATCH_SIZE, ignore_conflicts=True)
+        # порядок по номеру: первые пользователи — самые популярные авторы
+        by_name = dict(User.objects.filter(
+            username__startswith=prefix).values_list('username', 'pk'))
+        return [by_name[f'{prefix}{num}'] for num in range(count)]
+
+    def create_groups(self, prefix, count):
+        Group.objects.bulk_create(
+            [Group(title=f'Группа {num}', slug=f'{prefix}-{num}',
+                   description=f'Синтетическая группа {num}')
+             for num in range(count)],
+            batch_size=BATCH_SIZE, ignore_conflicts=True)
+        return list(Group.objects.filter(
+            slug__startswith=f'{prefix}-').values_list('pk', flat=True))
+
+    def create_images(self, rnd, prefix, count=8):
+        names = []
+        for num in range(count):
+            color = tuple(rnd.randrange(256) for _ in range(3))
+            buffer = BytesIO()
+            Image.new('RGB', (1200, 800), color).save(buffer, 'JPEG')
+            names.append(default_storage.save(
+                f'posts/{prefix}-{num}.jpg', ContentFile(buffer.getvalue())))
+        return names
+
+    def create_posts(self, rnd, options, users, weights, groups, images,
+                     prefix):
+        now = timezone.now()
+        span = options['days'] * 24 * 3600
+        authors = rnd.choices(users, weights, k=options['posts'])
+        batch = []
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            for author_id in authors:
+                batch.append(Post(
+                    text=make_text(rnd, rnd.randint(5, 60)),
+                    author_id=author_id,
+                    group_id=(rnd.choice(groups)
+                              if groups and rnd.random() < 0.5 else None),
+                    image=(rnd.choice(images)
+                           if images and rnd.random() < options['images']
+                           else ''),
+                    pub_date=now - timedelta(seconds=rnd.randrange(span)),
+                ))
+            Post.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+        return list(Post.objects.filter(
+            author__username__startswith=prefix).values_list('pk', 'pub_date'))
+
+    def create_comments(self, rnd, count, users, posts):
+        if not posts:
+            return 0
+        now = timezone.now()
+        with explicit_dates(Comment._meta.get_field('created')):
+            for start in range(0, count, BATCH_SIZE):
+                batch = []
+                for _ in range(min(BATCH_SIZE, count - start)):
+                    post_id, pub_date = rnd.choice(posts)
+                    seconds = int((now - pub_date).total_seconds())
+                    batch.append(Comment(
+                        post_id=post_id,
+                        author_id=rnd.choice(users),
+                        text=make_text(rnd, rnd.randint(3, 20)),
+                        created=pub_date + timedelta(
+                            seconds=rnd.randrange(max(seconds, 1))),
+                    ))
+                Comment.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+        return count
+
+    def create_follows(self, rnd, per_user, users, weights):
+        pairs = set()
+        for user_id in users:
+            for author_id in rnd.choices(users, weights,
+                                         k=rnd.randint(0, per_user * 2)):
+                if author_id != user_id:
+                    pairs.add((user_id, author_id))
+        Follow.objects.bulk_create(
+            [Follow(user_id=user_id, author_id=author_id)
+             for user_id, author_id in pairs],
+            batch_size=BATCH_SIZE, ignore_conflicts=True)
+        return len(pairs)
+
+    def build_timelines(self):
+        # ленты собираются заново одним INSERT ... SELECT: по TIMELINE_LENGTH
+        # свежих постов на подписчика, без backfill и trim по каждой подписке
+        entries = TimelineEntry._meta.db_table
+        TimelineEntry.objects.all()._raw_delete(TimelineEntry.objects.db)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {entries} (user_id, post_id, author_id, pub_date) '
+                'SELECT user_id, post_id, author_id, pub_date FROM ('
+                'SELECT f.user_id, p.id AS post_id, p.author_id, p.pub_date, '
+                'ROW_NUMBER() OVER (PARTITION BY f.user_id '
+                'ORDER BY p.pub_date DESC, p.id DESC) AS position '
+                f'FROM {Follow._meta.db_table} f '
+                f'JOIN {Post._meta.db_table} p ON p.author_id = f.author_id'
+                ') WHERE position <= %s',
+                [timeline.TIMELINE_LENGTH])
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = ('Переносит эпоху популярности: оценки постов затухают, остывшие '
+            'удаляются. Запускать периодически, например раз в час.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересчитать оценки заново по недавним комментариям')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            count = trending.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f'Пересчитано постов: {count}'))
+            return
+        removed = trending.rebase()
+        self.stdout.write(self.style.SUCCESS(
+            f'Оценки пересчитаны, удалено остывших: {removed}'))
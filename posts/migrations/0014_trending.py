@@ -0,0 +1,61 @@
+# Generated by Django 2.2.28 on 2026-10-18 18:34
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+HALF_LIFE = getattr(settings, 'POSTS_TRENDING_HALF_LIFE', 6 * 60 * 60)
+
+
+def fill_trending(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+    TrendingEpoch = apps.get_model('posts', 'TrendingEpoch')
+    TrendingScore = apps.get_model('posts', 'TrendingScore')
+    now = timezone.now()
+    TrendingEpoch.objects.create(pk=1, started=now)
+    scores = {}
+    recent = Comment.objects.filter(
+        created__gte=now - timedelta(seconds=HALF_LIFE * 10))
+    for post_id, created in recent.values_list('post_id', 'created'):
+        scores[post_id] = scores.get(post_id, 0) + 2 ** (
+            (created - now).total_seconds() / HALF_LIFE)
+    TrendingScore.objects.bulk_create(
+        [TrendingScore(post_id=post_id, score=score)
+         for post_id, score in scores.items()],
+        batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingEpoch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post')),
+                ('score', models.FloatField(default=0, verbose_name='Оценка')),
+            ],
+            options={
+                'verbose_name': 'Популярность поста',
+                'verbose_name_plural': 'Популярность постов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trendingscore',
+            index=models.Index(fields=['-score'], name='posts_trending_score_idx'),
+        ),
+        migrations.RunPython(fill_trending, migrations.RunPython.noop),
+    ]
@@ -1,37 +1,88 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
-class Post(models.Model):
+class CountersModel(models.Model):
+    """Сохраняет строку вместе с обработчиками сигналов в одной транзакции
+    и не перезаписывает счётчики при обновлении строки."""
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if (self.counter_fields and not self._state.adding
+                and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        return self.select_related('author', 'group')
+
+
+class Post(CountersModel):
     text = models.TextField(verbose_name='Текст', help_text='Напишите содержимое поста')
     pub_date = models.DateTimeField("date published", auto_now_add=True)
-    author = models.ForeignKey(User, on_delete=models.CASCADE,
+    author = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False,
                                related_name="posts", verbose_name='Автор')
-    group = models.ForeignKey('Group', on_delete=models.CASCADE,
+    group = models.ForeignKey('Group', on_delete=models.CASCADE, db_index=False,
                               related_name="posts", blank=True, null=True,
                               verbose_name='Группа', help_text='Укажите название группы')
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    comments_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Комментариев')
+
+    objects = PostQuerySet.as_manager()
+    counter_fields = ('comments_count',)
 
     class Meta:
-        ordering = ["-pub_date"]
+        ordering = ["-pub_date", "-id"]
+        indexes = [
+            models.Index(fields=["-pub_date", "-id"],
+                         name="posts_post_pub_date_id_idx"),
+            models.Index(fields=["author", "-pub_date", "-id"],
+                         name="posts_post_author_feed_idx"),
+            models.Index(fields=["group", "-pub_date", "-id"],
+                         name="posts_post_group_feed_idx"),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
 
-class Group(models.Model):
+class Group(CountersModel):
     title = models.CharField(max_length=200, verbose_name="Название")
     slug = models.fields.SlugField(unique=True, verbose_name="Уникальный адрес")
     description = models.TextField(verbose_name="Описание")
+    posts_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Записей")
+
+    counter_fields = ('posts_count',)
 
     def __str__(self):
         return self.title
 
 
-class Comment(models.Model):
-    post = models.ForeignKey('Post', on_delete=models.CASCADE,
+class Comment(CountersModel):
+    post = models.ForeignKey('Post', on_delete=models.CASCADE, db_index=False,
                              related_name="comments", verbose_name='Комментарий')
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name="comments",
@@ -40,9 +91,81 @@ class Comment(models.Model):
                             help_text='Оставьте комментарий')
     created = models.DateTimeField("date published", auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["post", "created"],
+                         name="posts_comment_post_idx"),
+        ]
+
 
-class Follow(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE,
+class Follow(CountersModel):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False,
                              related_name="follower")
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name="following")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "author"],
+                                    name="posts_follow_user_author_uniq"),
+        ]
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True, related_name="stats")
+    posts_count = models.PositiveIntegerField(default=0, verbose_name="Записей")
+    followers_count = models.PositiveIntegerField(
+        default=0, verbose_name="Подписчиков")
+    following_count = models.PositiveIntegerField(
+        default=0, verbose_name="Подписок")
+
+    class Meta:
+        verbose_name = "Статистика пользователя"
+        verbose_name_plural = "Статистика пользователей"
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False,
+                             related_name="timeline")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name="timeline_entries")
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name="+")
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-pub_date", "-post"]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "post"],
+                                    name="posts_timeline_user_post_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-pub_date", "-post"],
+                         name="posts_timeline_feed_idx"),
+            models.Index(fields=["user", "author"],
+                         name="posts_timeline_author_idx"),
+        ]
+
+
+class TrendingScore(models.Model):
+    """Затухающая оценка активности вокруг поста.
+
+    Хранится в единицах эпохи TrendingEpoch: прибавка за событие растёт как
+    2 ** (t / период полураспада), поэтому порядок по score верен в любой
+    момент без пересчёта. Команда update_trending переносит эпоху и
+    уменьшает все оценки."""
+    post = models.OneToOneField(Post, on_delete=models.CASCADE,
+                                primary_key=True, related_name="trending")
+    score = models.FloatField(default=0, verbose_name="Оценка")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-score"], name="posts_trending_score_idx"),
+        ]
+        verbose_name = "Популярность поста"
+        verbose_name_plural = "Популярность постов"
+
+
+class TrendingEpoch(models.Model):
+    started = models.DateTimeField()
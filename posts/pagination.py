@@ -0,0 +1,199 @@
+import base64
+import binascii
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .caching import can_store
+
+PAGE_SIZE = 10
+COMMENTS_PAGE_SIZE = 50
+
+
+def encode_cursor(pub_date, pk):
+    raw = f'{pub_date.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        pub_date, pk = raw.decode().split('|')
+        pub_date, pk = parse_datetime(pub_date), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+def cached_count(queryset, version=None, timeout=None):
+    """COUNT(*) по queryset, запомненный в кеше для этой версии данных."""
+    sql = str(queryset.order_by().query)
+    digest = hashlib.md5(f'{version}:{sql}'.encode()).hexdigest()
+    key = f'posts:count:{queryset.model._meta.label_lower}:{digest}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        if can_store():
+            cache.set(key, count, timeout)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который считает строки не чаще раза в count_timeout секунд."""
+    count_timeout = settings.ADMIN_COUNT_CACHE_TIMEOUT
+
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list, timeout=self.count_timeout)
+
+
+class CursorPage:
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.cursor_for(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.cursor_for(self.object_list[0])
+
+
+class CursorPaginator:
+    """Keyset-пагинация по (field, id) без OFFSET и COUNT(*).
+
+    По умолчанию — ленты, от новых постов к старым; descending = False
+    листает от старых к новым, как комментарии под постом.
+
+    ordering — пара (значение, id), по которой сортируют, отсекают
+    страницы и берут курсор из объекта; по умолчанию (field, 'pk'). Лента
+    подписок передаёт аннотации с колонками posts_timelineentry: фильтр по
+    ним не добавляет второго JOIN, и страницу отдаёт индекс ленты."""
+    cursor = True
+    field = 'pub_date'
+    descending = True
+
+    def __init__(self, object_list, per_page, ordering=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = ordering or (self.field, 'pk')
+
+    def cursor_for(self, obj):
+        return encode_cursor(*(getattr(obj, name) for name in self.ordering))
+
+    def _beyond(self, cursor, lookup):
+        """Строки за курсором в сторону lookup ('lt' или 'gt') в порядке
+        удаления от него."""
+        value, pk = cursor
+        field, pk_field = self.ordering
+        sign = '-' if lookup == 'lt' else ''
+        # нестрогая граница по field даёт индексу диапазон, OR — лишь
+        # уточнение внутри него
+        return self.object_list.filter(
+            Q(**{f'{field}__{lookup}': value})
+            | Q(**{field: value, f'{pk_field}__{lookup}': pk}),
+            **{f'{field}__{lookup}e': value},
+        ).order_by(f'{sign}{field}', f'{sign}{pk_field}')
+
+    def page(self, after=None, before=None):
+        after = decode_cursor(after) if after else None
+        before = decode_cursor(before) if before else None
+        forward, backward = ('lt', 'gt') if self.descending else ('gt', 'lt')
+        if before is not None:
+            rows = list(self._beyond(before, backward)[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return CursorPage(rows, self, True, has_previous)
+
+        if after is not None:
+            queryset = self._beyond(after, forward)
+        else:
+            sign = '-' if self.descending else ''
+            queryset = self.object_list.order_by(
+                *(f'{sign}{column}' for column in self.ordering))
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return CursorPage(rows[:self.per_page], self, has_next,
+                          after is not None)
+
+
+def paginate(request, object_list, per_page=PAGE_SIZE, count=None,
+             ordering=None):
+    """Возвращает (paginator, page): keyset-режим при ?after=/?before=,
+    иначе обычный Paginator по ?page=.
+
+    У страницы по номеру есть next_cursor: ссылка «Следующая» ведёт по
+    курсору, и дальше лента листается без OFFSET.
+
+    count — функция, которая отдаёт число объектов без COUNT(*) по таблице
+    (хранимый счётчик или закешированное значение); ordering — колонки
+    курсора, см. CursorPaginator."""
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    cursor_paginator = CursorPaginator(object_list, per_page, ordering)
+    if after or before:
+        return cursor_paginator, cursor_paginator.page(after=after,
+                                                       before=before)
+    paginator = Paginator(object_list, per_page)
+    if count:
+        paginator.count = count()
+    page = paginator.get_page(request.GET.get('page'))
+
+    # шаблон вызовет функцию сам: если страница взята из кеша фрагментов,
+    # посты не читаются
+    def next_cursor():
+        if not page.has_next():
+            return None
+        return cursor_paginator.cursor_for(page[-1])
+    page.next_cursor = next_cursor
+    return paginator, page
+
+
+def page_window(page, size=2):
+    """Номера страниц вокруг текущей, первая и последняя;
+    None на месте пропуска."""
+    last = page.paginator.num_pages
+    numbers = sorted({1, last} | set(range(
+        max(1, page.number - size), min(last, page.number + size) + 1)))
+    window = []
+    for number in numbers:
+        if window and number - window[-1] > 1:
+            window.append(None)
+        window.append(number)
+    return window
@@ -0,0 +1,76 @@
+import hashlib
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .caching import CONTENT, can_store, get_version
+from .models import Post
+
+MATCH_SQL = 'SELECT rowid FROM posts_post_fts WHERE posts_post_fts MATCH %s'
+
+
+def to_match(query):
+    """Превращает ввод пользователя в безопасный запрос FTS5:
+    каждое слово — префикс, все слова обязательны."""
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+class SearchResults:
+    """Ранжированная выдача FTS5, которую умеет листать Paginator."""
+
+    def __init__(self, match):
+        self.match = match
+
+    def count(self):
+        key = 'posts:search-count:' + hashlib.md5(
+            f'{get_version(CONTENT)}:{self.match}'.encode()).hexdigest()
+        total = cache.get(key)
+        if total is None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT count(*) FROM posts_post_fts '
+                    'WHERE posts_post_fts MATCH %s', [self.match])
+                total = cursor.fetchone()[0]
+            if can_store():
+                cache.set(key, total, None)
+        return total
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        offset = index.start or 0
+        limit = index.stop - offset
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{MATCH_SQL} ORDER BY rank LIMIT %s OFFSET %s',
+                [self.match, limit, offset])
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.for_feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(query):
+    match = to_match(query)
+    if not match:
+        return Post.objects.none()
+    if not fts_available():
+        return Post.objects.for_feed().filter(text__icontains=query)
+    return SearchResults(match)
+
+
+def filter_posts(queryset, query):
+    """Оставляет в queryset посты, найденные по индексу."""
+    match = to_match(query)
+    if not match:
+        return queryset.none()
+    return queryset.filter(pk__in=RawSQL(MATCH_SQL, (match,)))
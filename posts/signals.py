@@ -0,0 +1,135 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import timeline, trending
+from .caching import CONTENT, FOLLOWS, bump_versions, feed_version_name
+from .counters import change
+from .models import Comment, Follow, Group, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        UserStats.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        change(UserStats, instance.author_id, posts_count=1)
+        change(Group, instance.group_id, posts_count=1)
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    old_author = loaded.get('author_id', instance.author_id)
+    if old_author != instance.author_id:
+        change(UserStats, old_author, posts_count=-1)
+        change(UserStats, instance.author_id, posts_count=1)
+    old_group = loaded.get('group_id', instance.group_id)
+    if old_group != instance.group_id:
+        change(Group, old_group, posts_count=-1)
+        change(Group, instance.group_id, posts_count=1)
+    instance._loaded_values = dict(
+        loaded, author_id=instance.author_id, group_id=instance.group_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    change(UserStats, instance.author_id, posts_count=-1)
+    change(Group, instance.group_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        change(Post, instance.post_id, comments_count=1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    change(Post, instance.post_id, comments_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        change(UserStats, instance.author_id, followers_count=1)
+        change(UserStats, instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change(UserStats, instance.author_id, followers_count=-1)
+    change(UserStats, instance.user_id, following_count=-1)
+
+
+def invalidate_feeds(user_ids):
+    bump_versions(*[feed_version_name(user_id) for user_id in user_ids])
+
+
+def invalidate_feeds_with(post_id):
+    invalidate_feeds(TimelineEntry.objects.filter(post_id=post_id)
+                     .values_list('user_id', flat=True))
+
+
+@receiver(post_save, sender=Post)
+def post_fan_out(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        invalidate_feeds(timeline.fan_out(instance))
+    else:
+        invalidate_feeds_with(instance.pk)
+
+
+@receiver(pre_delete, sender=Post)
+def post_leaves_feeds(sender, instance, **kwargs):
+    invalidate_feeds_with(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changes_feeds(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_feeds_with(instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_backfill(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        timeline.backfill(instance.user_id, instance.author_id)
+        invalidate_feeds([instance.user_id])
+
+
+@receiver(post_delete, sender=Follow)
+def follow_prune(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+    invalidate_feeds([instance.user_id])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def content_changed(sender, raw=False, **kwargs):
+    if not raw:
+        bump_versions(CONTENT)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follows_changed(sender, raw=False, **kwargs):
+    if not raw:
+        bump_versions(FOLLOWS)
+
+
+@receiver(post_save, sender=Comment)
+def comment_trending(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        trending.record(instance.post_id, 'comment', instance.created)
@@ -0,0 +1,67 @@
+from functools import lru_cache
+from urllib.parse import quote
+
+from django import template
+from django.urls import get_script_prefix, reverse
+
+from posts import pagination, thumbnails
+
+register = template.Library()
+
+# метки, которые reverse() пропускает без изменений
+_MARKERS = {'username': 'username0marker', 'post_id': 9081726354,
+            'slug': 'slug0marker'}
+# так же экранирует аргументы сам reverse()
+_SAFE = "!$&'()*+,;=" + '/~:@'
+
+
+@lru_cache(maxsize=None)
+def _url_template(name, prefix, *params):
+    url = reverse(name, kwargs={param: _MARKERS[param] for param in params})
+    for param in params:
+        url = url.replace(str(_MARKERS[param]), f'{{{param}}}')
+    return url
+
+
+def fast_reverse(name, **kwargs):
+    """reverse() для адресов карточки: шаблон адреса разбирается один раз,
+    дальше только подстановка."""
+    url = _url_template(name, get_script_prefix(), *sorted(kwargs))
+    return url.format(**{key: quote(str(value), safe=_SAFE)
+                         for key, value in kwargs.items()})
+
+
+@register.inclusion_tag('post_item.html', takes_context=True)
+def post_card(context, post):
+    user = context.get('user')
+    username = post.author.username
+    can_edit = user is not None and user.pk == post.author_id
+    return {
+        'post': post,
+        'username': username,
+        # готовая миниатюра или None, пока фоновый поток её не создал
+        'thumbnail': thumbnails.ready_thumbnail(post.image),
+        'profile_url': fast_reverse('posts:profile', username=username),
+        'post_url': fast_reverse('posts:post', username=username,
+                                 post_id=post.pk),
+        'edit_url': can_edit and fast_reverse(
+            'posts:post_edit', username=username, post_id=post.pk),
+        'group_url': post.group_id and fast_reverse(
+            'posts:group_posts', slug=post.group.slug),
+    }
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, **params):
+    """Ссылка на другую страницу с сохранением остальных GET-параметров."""
+    query = context['request'].GET.copy()
+    for key in ('page', 'after', 'before'):
+        query.pop(key, None)
+    for key, value in params.items():
+        query[key] = value
+    return f'?{query.urlencode()}'
+
+
+@register.simple_tag
+def page_window(page):
+    return pagination.page_window(page)
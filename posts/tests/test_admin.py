@@ -0,0 +1,81 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+
+class AdminChangelistTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.group = Group.objects.create(title='Группа', slug='group',
+                                          description='описание')
+        self.urls = [reverse(f'admin:posts_{model}_changelist')
+                     for model in ('post', 'group', 'comment', 'follow')]
+
+    def add_rows(self, num):
+        author = User.objects.create_user(username=f'author{num}')
+        post = Post.objects.create(text='Пост', author=author,
+                                   group=self.group)
+        Comment.objects.create(post=post, author=author, text='Коммент')
+        Follow.objects.create(user=self.admin, author=author)
+
+    def queries(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in context]
+
+    def test_queries_do_not_grow_with_rows(self):
+        """Число запросов списка не зависит от числа строк на странице."""
+        self.add_rows(0)
+        # сессия и пользователь в обоих замерах читаются из базы один раз
+        cache.clear()
+        before = {url: len(self.queries(url)) for url in self.urls}
+        for num in range(1, 6):
+            self.add_rows(num)
+        cache.clear()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertEqual(len(self.queries(url)), before[url])
+
+    def test_count_is_cached(self):
+        """Повторный запрос списка не выполняет COUNT(*)."""
+        self.add_rows(0)
+        url = reverse('admin:posts_post_changelist')
+        self.queries(url)
+        counts = [sql for sql in self.queries(url) if 'COUNT(*)' in sql]
+        self.assertEqual(counts, [])
+
+    def test_date_hierarchy_uses_index(self):
+        """Ссылки по годам и месяцам считаются поисками по диапазону
+        pub_date, без функции над каждой строкой."""
+        author = User.objects.create_user(username='author')
+        for moment in ('2019-03-05', '2021-07-01', '2021-07-20', '2021-11-02'):
+            post = Post.objects.create(text='Пост', author=author)
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=f'{moment} 12:00:00+00:00')
+        url = reverse('admin:posts_post_changelist')
+        for params, links in (
+                ({}, ['pub_date__year=2019', 'pub_date__year=2021']),
+                ({'pub_date__year': 2021},
+                 ['pub_date__month=7', 'pub_date__month=11']),
+                ({'pub_date__year': 2021, 'pub_date__month': 7},
+                 ['pub_date__day=1', 'pub_date__day=20'])):
+            with self.subTest(params=params):
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.get(url, params)
+                content = response.content.decode()
+                for link in links:
+                    self.assertIn(link, content)
+                self.assertNotIn('pub_date__year=2020', content)
+                self.assertNotIn('pub_date__month=8', content)
+                for query in context:
+                    self.assertNotIn('_trunc(', query['sql'])
@@ -0,0 +1,91 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post, UserStats
+from posts.views import follow_author
+
+
+class AjaxWriteTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.leo = User.objects.create_user(username='leo')
+        self.reader = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(text='Пост', author=self.leo)
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.follow_url = reverse('posts:ajax_follow', args=['leo'])
+        self.unfollow_url = reverse('posts:ajax_unfollow', args=['leo'])
+        self.comment_url = reverse('posts:ajax_comment',
+                                   args=['leo', self.post.id])
+
+    def test_follow_returns_counter(self):
+        """Подписка отдаёт только новое состояние и счётчик."""
+        for _ in range(2):
+            response = self.client.post(self.follow_url)
+            self.assertEqual(response.json(),
+                             {'following': True, 'followers_count': 1})
+        self.assertEqual(Follow.objects.filter(
+            user=self.reader, author=self.leo).count(), 1)
+
+    def test_unfollow_returns_counter(self):
+        Follow.objects.create(user=self.reader, author=self.leo)
+        for _ in range(2):
+            response = self.client.post(self.unfollow_url)
+            self.assertEqual(response.json(),
+                             {'following': False, 'followers_count': 0})
+        self.assertFalse(Follow.objects.exists())
+
+    def test_cannot_follow_self(self):
+        response = self.client.post(
+            reverse('posts:ajax_follow', args=['reader']))
+        self.assertEqual(response.json(),
+                         {'following': False, 'followers_count': 0})
+        self.assertFalse(Follow.objects.exists())
+
+    def test_repeated_follow_does_not_double_count(self):
+        """Повтор (как из параллельного запроса) упирается в уникальный
+        индекс и не трогает счётчики."""
+        follow_author(self.reader, self.leo.pk)
+        follow_author(self.reader, self.leo.pk)
+        stats = UserStats.objects.get(user=self.leo)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_comment_returns_fragment(self):
+        response = self.client.post(self.comment_url, {'text': 'Привет'})
+        comment = Comment.objects.get()
+        self.assertEqual(response.status_code, 201)
+        self.assertTemplateUsed(response, 'comment_item.html')
+        self.assertContains(response, 'Привет', status_code=201)
+        self.assertContains(response, f'name="comment_{comment.id}"',
+                            status_code=201)
+        self.assertNotContains(response, '<html', status_code=201)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_invalid_comment(self):
+        response = self.client.post(self.comment_url, {'text': ''})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
+        self.assertFalse(Comment.objects.exists())
+        wrong = reverse('posts:ajax_comment', args=['reader', self.post.id])
+        self.assertEqual(self.client.post(wrong, {'text': 'x'}).status_code,
+                         404)
+
+    def test_only_post_and_only_logged_in(self):
+        for url in (self.follow_url, self.unfollow_url, self.comment_url):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 405)
+                self.assertEqual(Client().post(url).status_code, 401)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_pages_link_to_ajax_endpoints(self):
+        """Обычные ссылки и форма остаются, скрипт берёт data-атрибуты."""
+        response = self.client.get(
+            reverse('posts:post', args=['leo', self.post.id]))
+        self.assertContains(response, self.follow_url)
+        self.assertContains(response, self.comment_url)
+        self.assertContains(
+            response, reverse('posts:profile_follow', args=['leo']))
@@ -0,0 +1,75 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+
+from posts import counters, timeline, urls
+from posts.models import Comment, Follow, Post, TimelineEntry
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SeedAndBenchmarkTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('seed_data', users=30, posts=200, comments=300,
+                     groups=3, follows=5, images=0.3, stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def test_seeded_data_is_consistent(self):
+        """Счётчики и ленты после bulk_create совпадают с пересчитанными."""
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertTrue(Post.objects.filter(image='').exists())
+        self.assertFalse(Follow.objects.filter(
+            user_id=F('author_id')).exists())
+        self.assertFalse(any(wrong for *_, wrong in counters.mismatches()))
+        user_id = Follow.objects.values_list('user_id', flat=True).first()
+        seeded = set(TimelineEntry.objects.filter(
+            user_id=user_id).values_list('post_id', flat=True))
+        timeline.rebuild(user_id)
+        self.assertEqual(seeded, set(TimelineEntry.objects.filter(
+            user_id=user_id).values_list('post_id', flat=True)))
+
+    def test_popular_authors_get_most_followers(self):
+        """Подписки распределены по степенному закону."""
+        first = Follow.objects.filter(author__username='seed0').count()
+        last = Follow.objects.filter(author__username='seed29').count()
+        self.assertGreater(first, last)
+
+    def test_benchmark_covers_every_url(self):
+        path = os.path.join(MEDIA_ROOT, 'baseline.json')
+        out = StringIO()
+        follows = Follow.objects.count()
+        comments = Comment.objects.count()
+        call_command('benchmark', requests=2, warmup=1, save=path,
+                     stdout=out)
+        with open(path) as file:
+            baseline = json.load(file)
+        self.assertEqual(set(baseline),
+                         {pattern.name for pattern in urls.urlpatterns})
+        self.assertEqual(baseline['post']['status'], 200)
+        # POST-адреса замеряются POST-запросом с CSRF-токеном
+        self.assertEqual(baseline['ajax_follow']['status'], 200)
+        self.assertEqual(baseline['ajax_unfollow']['status'], 200)
+        self.assertEqual(baseline['ajax_comment']['status'], 201)
+        self.assertEqual(Follow.objects.count(), follows)
+        self.assertEqual(Comment.objects.count(), comments)
+
+        baseline['post']['queries'] -= 1
+        with open(path, 'w') as file:
+            json.dump(baseline, file)
+        with self.assertRaisesMessage(CommandError, 'post'):
+            call_command('benchmark', requests=2, warmup=1, compare=path,
+                         threshold=10 ** 6, stdout=StringIO())
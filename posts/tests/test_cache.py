@@ -0,0 +1,100 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.caching import CONTENT, get_version
+from posts.models import Comment, Follow, Group, Post
+
+
+class FollowFeedCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.leo = User.objects.create_user(username='leo')
+        self.tolstoy = User.objects.create_user(username='tolstoy')
+        self.anna = User.objects.create_user(username='anna')
+        self.boris = User.objects.create_user(username='boris')
+        Post.objects.create(text='Пост Лео', author=self.leo)
+        Post.objects.create(text='Пост Толстого', author=self.tolstoy)
+        Follow.objects.create(user=self.anna, author=self.leo)
+        Follow.objects.create(user=self.boris, author=self.tolstoy)
+        self.anna_client = Client()
+        self.anna_client.force_login(self.anna)
+        self.boris_client = Client()
+        self.boris_client.force_login(self.boris)
+        self.url = reverse('posts:follow_index')
+
+    def feed(self, client):
+        return client.get(self.url).content.decode()
+
+    def test_users_never_see_each_other_feed(self):
+        """Закешированная лента одного пользователя не отдаётся другому."""
+        anna_feed = self.feed(self.anna_client)
+        boris_feed = self.feed(self.boris_client)
+        self.assertIn('Пост Лео', anna_feed)
+        self.assertNotIn('Пост Толстого', anna_feed)
+        self.assertIn('Пост Толстого', boris_feed)
+        self.assertNotIn('Пост Лео', boris_feed)
+        self.assertNotIn('Пост Толстого', self.feed(self.anna_client))
+
+    def test_feed_is_invalidated_at_once(self):
+        """Новые посты, комментарии и подписки сразу видны в ленте."""
+        self.feed(self.anna_client)
+        post = Post.objects.create(text='Свежий пост Лео', author=self.leo)
+        self.assertIn('Свежий пост Лео', self.feed(self.anna_client))
+
+        Comment.objects.create(post=post, author=self.boris, text='Ок')
+        self.assertIn('Комментариев: 1', self.feed(self.anna_client))
+
+        Follow.objects.create(user=self.anna, author=self.tolstoy)
+        self.assertIn('Пост Толстого', self.feed(self.anna_client))
+
+    def test_unrelated_post_keeps_cache(self):
+        """Пост автора, на которого не подписан, не сбрасывает кеш."""
+        self.feed(self.anna_client)
+        Post.objects.filter(author=self.leo).update(text='Изменено в обход')
+        Post.objects.create(text='Ещё пост Толстого', author=self.tolstoy)
+        self.assertIn('Пост Лео', self.feed(self.anna_client))
+
+
+class IndexCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='john')
+        self.post = Post.objects.create(text='Первый пост', author=self.user)
+        self.guest_client = Client()
+        self.url = reverse('posts:index')
+
+    def index(self):
+        return self.guest_client.get(self.url).content.decode()
+
+    def test_index_is_served_from_cache(self):
+        """Пока версия не сдвинута, главная отдаётся из кеша."""
+        self.index()
+        Post.objects.filter(pk=self.post.pk).update(text='Изменено в обход')
+        self.assertIn('Первый пост', self.index())
+
+    def test_changes_bump_version(self):
+        """Создание, правка и удаление постов, комментариев и групп
+        сразу видны на главной."""
+        self.index()
+        Post.objects.create(text='Второй пост', author=self.user)
+        self.assertIn('Второй пост', self.index())
+
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.assertIn('Исправленный пост', self.index())
+
+        Comment.objects.create(post=self.post, author=self.user, text='Ок')
+        self.assertIn('Комментариев: 1', self.index())
+
+        version = get_version(CONTENT)
+        group = Group.objects.create(title='Группа', slug='group',
+                                     description='описание')
+        self.assertNotEqual(get_version(CONTENT), version)
+        version = get_version(CONTENT)
+        group.delete()
+        self.assertNotEqual(get_version(CONTENT), version)
+
+        self.post.delete()
+        self.assertNotIn('Исправленный пост', self.index())
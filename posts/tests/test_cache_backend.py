@@ -0,0 +1,138 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from yatube.cache import SQLiteCache
+
+
+def _increment(path, times):
+    cache = SQLiteCache(path, {})
+    for _ in range(times):
+        cache.incr('hits')
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.path, {'OPTIONS': options})
+
+    def test_values_round_trip(self):
+        values = {'int': 5, 'flag': True, 'text': 'пост', 'list': [1, 'a'],
+                  'big': 2 ** 70, 'none': None}
+        self.cache.set_many(values)
+        self.assertEqual(self.cache.get_many(list(values) + ['missing']),
+                         values)
+        self.assertIs(self.cache.get('flag'), True)
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+
+    def test_add_keeps_live_value(self):
+        self.assertTrue(self.cache.add('key', 1))
+        self.assertFalse(self.cache.add('key', 2))
+        self.assertEqual(self.cache.get('key'), 1)
+        self.cache.set('short', 1, timeout=0.01)
+        time.sleep(0.02)
+        self.assertFalse(self.cache.has_key('short'))
+        self.assertTrue(self.cache.add('short', 2))
+        self.assertEqual(self.cache.get('short'), 2)
+
+    def test_incr_and_decr(self):
+        self.cache.set('num', 10)
+        self.assertEqual(self.cache.incr('num', 5), 15)
+        self.assertEqual(self.cache.decr('num'), 14)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_incr_does_not_overflow(self):
+        """Сумма за пределами 64 бит не превращается в REAL."""
+        self.cache.set('num', 2 ** 63 - 1)
+        with self.assertRaises(ValueError):
+            self.cache.incr('num')
+        self.cache.set('neg', -2 ** 63)
+        with self.assertRaises(ValueError):
+            self.cache.decr('neg')
+        self.assertEqual(self.cache.get_many(['num', 'neg']),
+                         {'num': 2 ** 63 - 1, 'neg': -2 ** 63})
+
+    def test_get_does_not_wait_for_writer(self):
+        """Пока другой процесс пишет, чтение не ждёт BUSY_TIMEOUT ради
+        отметки о доступе."""
+        cache = self.make_cache(ACCESS_RESOLUTION=0, BUSY_TIMEOUT=2)
+        cache.set('key', 1)
+        writer = self.make_cache()._db
+        writer.execute('BEGIN IMMEDIATE')
+        try:
+            start = time.monotonic()
+            self.assertEqual(cache.get('key'), 1)
+            self.assertEqual(cache.get_many(['key']), {'key': 1})
+            self.assertLess(time.monotonic() - start, 1)
+        finally:
+            writer.execute('ROLLBACK')
+        # обычные записи по-прежнему ждут
+        self.assertEqual(
+            cache._db.execute('PRAGMA busy_timeout').fetchone()[0], 2000)
+
+    def test_delete_touch_and_clear(self):
+        self.cache.set_many({'a': 1, 'b': 2, 'c': 3})
+        self.cache.delete('a')
+        self.cache.delete_many(['b'])
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'c': 3})
+        self.assertTrue(self.cache.touch('c', 0.01))
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('c'))
+        self.cache.set('d', 4)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('d'))
+
+    def test_least_recently_read_entries_are_evicted(self):
+        cache = self.make_cache(MAX_ENTRIES=10, CULL_FREQUENCY=5,
+                                ACCESS_RESOLUTION=0)
+        for num in range(10):
+            cache.set(f'key{num}', num)
+        cache.get('key0')
+        for num in range(10, 15):
+            cache.set(f'key{num}', num)
+        entries = cache._db.execute('SELECT COUNT(*) FROM cache').fetchone()
+        self.assertLessEqual(entries[0], 10)
+        self.assertEqual(cache.get('key0'), 0)
+        self.assertIsNone(cache.get('key1'))
+        self.assertEqual(cache.get('key14'), 14)
+
+    def test_incr_is_atomic_across_processes(self):
+        self.cache.set('hits', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_increment, args=(self.path, 100))
+                   for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('hits'), 400)
+
+    def test_tests_do_not_touch_site_cache(self):
+        """cache.clear() в тестах чистит свой файл, а не кеш сайта."""
+        self.assertNotEqual(os.path.dirname(cache.path), settings.BASE_DIR)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_cache', processes=2, seconds=0.2,
+                     operations=['get', 'incr'], stdout=out)
+        rows = {line.split()[0]: line.split()
+                for line in out.getvalue().splitlines()[1:]}
+        self.assertEqual(set(rows), {'locmem', 'filebased', 'sqlite'})
+        # общий счётчик SQLite не теряет ни одного incr
+        self.assertEqual(rows['sqlite'][-1], '0')
@@ -0,0 +1,83 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.leo = User.objects.create_user(username='leo')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='Кошки', slug='cats')
+        self.post = Post.objects.create(
+            text='Про кошек', author=self.leo, group=self.group)
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.urls = {
+            'group': reverse('posts:group_posts', args=['cats']),
+            'profile': reverse('posts:profile', args=['leo']),
+            'post': reverse('posts:post', args=['leo', self.post.id]),
+        }
+
+    def etag(self, url):
+        # первый ответ ставит CSRF-куку, от которой зависит ETag
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Cookie', response['Vary'])
+        self.assertTrue(response.has_header('Last-Modified'))
+        return response['ETag']
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code
+
+    def test_unchanged_pages_are_not_modified(self):
+        """Без изменений страницы отвечают 304 без рендера."""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                etag = self.etag(url)
+                with self.assertNumQueries(1):
+                    # время самой свежей записи; сессия и пользователь
+                    # уже в кеше
+                    status = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=etag).status_code
+                self.assertEqual(status, 304)
+
+    def test_edit_changes_validators(self):
+        """Правка поста, которая не меняет pub_date, сбрасывает ETag."""
+        etags = {name: self.etag(url) for name, url in self.urls.items()}
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Про котов'
+        post.save()
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                self.assertEqual(self.revalidate(url, etags[name]), 200)
+
+    def test_comment_changes_post_page(self):
+        url = self.urls['post']
+        etag = self.etag(url)
+        Comment.objects.create(post=self.post, author=self.reader, text='Мяу')
+        self.assertEqual(self.revalidate(url, etag), 200)
+
+    def test_follow_changes_profile(self):
+        url = self.urls['profile']
+        etag = self.etag(url)
+        Follow.objects.create(user=self.reader, author=self.leo)
+        self.assertEqual(self.revalidate(url, etag), 200)
+
+    def test_other_user_gets_own_page(self):
+        """ETag одного пользователя не подходит другому."""
+        url = self.urls['profile']
+        etag = self.etag(url)
+        self.client.force_login(self.leo)
+        self.assertEqual(self.revalidate(url, etag), 200)
+
+    def test_if_modified_since(self):
+        url = self.urls['group']
+        self.client.get(url)
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
@@ -0,0 +1,73 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Group, Post, UserStats
+
+
+class CountersTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='john')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='Группа', slug='group',
+                                          description='описание')
+        self.other_group = Group.objects.create(title='Другая', slug='other',
+                                                description='описание')
+        self.post = Post.objects.create(text='Пост', author=self.author,
+                                        group=self.group)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_counters(self):
+        """Создание, перенос в другую группу и удаление поста
+        меняют счётчики автора и групп."""
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(Group.objects.get(pk=self.group.pk).posts_count, 1)
+
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(Group.objects.get(pk=self.group.pk).posts_count, 0)
+        self.assertEqual(
+            Group.objects.get(pk=self.other_group.pk).posts_count, 1)
+
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+        self.assertEqual(
+            Group.objects.get(pk=self.other_group.pk).posts_count, 0)
+
+    def test_comment_counter_survives_post_edit(self):
+        """Редактирование устаревшего экземпляра поста
+        не затирает счётчик комментариев."""
+        stale = Post.objects.get(pk=self.post.pk)
+        Comment.objects.create(post=self.post, author=self.reader, text='Да')
+        stale.text = 'Новый текст'
+        stale.save()
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comments_count, 1)
+        Comment.objects.filter(post=self.post).delete()
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comments_count, 0)
+
+    def test_follow_counters(self):
+        """Подписка и отписка меняют счётчики обоих пользователей."""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_rebuild_command(self):
+        """rebuild_counters --check находит расхождения,
+        а rebuild_counters их исправляет."""
+        call_command('rebuild_counters', '--check', stdout=StringIO())
+        UserStats.objects.filter(user=self.author).update(posts_count=7)
+        Post.objects.update(comments_count=3)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_counters', '--check',
+                         stdout=StringIO(), stderr=StringIO())
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comments_count, 0)
@@ -0,0 +1,64 @@
+import re
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from yatube import metrics
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(metrics, 'registry', metrics.Registry())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.leo = User.objects.create_user(username='leo')
+        Post.objects.create(text='Пост', author=self.leo)
+        self.client = Client()
+
+    def timing(self, response):
+        return dict(re.findall(r'(\w+);(?:dur=)?([^,]+)',
+                               response['Server-Timing']))
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('posts:profile', args=['leo']))
+        timing = self.timing(response)
+        self.assertEqual(set(timing), {'db', 'tpl', 'cache', 'total'})
+        self.assertRegex(response['Server-Timing'],
+                         r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+
+    def test_cache_hits_and_misses(self):
+        url = reverse('posts:index')
+        first = self.client.get(url)['Server-Timing']
+        second = self.client.get(url)['Server-Timing']
+        self.assertRegex(first, r'[1-9]\d* misses')
+        self.assertNotRegex(second, r'[1-9]\d* misses')
+
+    def test_metrics_endpoint(self):
+        """/metrics отдаёт гистограммы по имени view в формате Prometheus."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'],
+                         'text/plain; version=0.0.4')
+        body = response.content.decode()
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram', body)
+        self.assertIn('yatube_request_duration_seconds_count'
+                      '{view="posts:index"} 2', body)
+        self.assertIn('yatube_request_db_queries_bucket'
+                      '{view="posts:index",le="+Inf"} 2', body)
+        self.assertRegex(body, r'yatube_cache_requests_total'
+                               r'\{view="posts:index",result="hit"\} [1-9]')
+
+
+class MetricsDisabledTest(TestCase):
+    def test_disabled(self):
+        """Выключенные метрики не добавляют заголовок и прячут /metrics."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
@@ -0,0 +1,39 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class DuplicateFollowMigrationTest(TransactionTestCase):
+    """База до уникальных подписок: profile_follow мог создать одну
+    подписку дважды."""
+    migrate_from = [('posts', '0008_follow')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.migrate_to = executor.loader.graph.leaf_nodes()
+        executor.migrate(self.migrate_from)
+        apps = executor.loader.project_state(self.migrate_from).apps
+        User = apps.get_model('auth', 'User')
+        Post = apps.get_model('posts', 'Post')
+        Follow = apps.get_model('posts', 'Follow')
+        self.reader = User.objects.create(username='reader')
+        author = User.objects.create(username='leo')
+        self.post = Post.objects.create(text='Пост', author=author)
+        for _ in range(2):
+            Follow.objects.create(user=self.reader, author=author)
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(self.migrate_to)
+
+    def test_migrate_with_duplicate_follow(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        apps = executor.loader.project_state(self.migrate_to).apps
+        Follow = apps.get_model('posts', 'Follow')
+        UserStats = apps.get_model('posts', 'UserStats')
+        TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(UserStats.objects.get(
+            user_id=self.reader.pk).following_count, 1)
+        self.assertEqual(list(TimelineEntry.objects.values_list(
+            'user_id', 'post_id')), [(self.reader.pk, self.post.pk)])
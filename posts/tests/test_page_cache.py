@@ -0,0 +1,104 @@
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from yatube.page_cache import HEADER, PageCacheMiddleware
+
+
+class PageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.leo = User.objects.create_user(username='leo')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='Кошки', slug='cats')
+        self.post = Post.objects.create(
+            text='Про кошек', author=self.leo, group=self.group)
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group_posts', args=['cats']),
+            'profile': reverse('posts:profile', args=['leo']),
+            'post': reverse('posts:post', args=['leo', self.post.id]),
+            'about': reverse('about:author'),
+        }
+
+    def get(self, url, **extra):
+        # новый клиент на каждый запрос: без cookie, как у поискового бота
+        return Client().get(url, **extra)
+
+    def test_second_anonymous_request_is_a_hit(self):
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                first = self.get(url)
+                self.assertEqual(first[HEADER], 'miss')
+                with self.assertNumQueries(0):
+                    second = self.get(url)
+                self.assertEqual(second[HEADER], 'hit')
+                self.assertEqual(second.content, first.content)
+
+    def test_query_string_is_part_of_key(self):
+        url = self.urls['index']
+        self.get(url)
+        self.assertEqual(self.get(url + '?page=2')[HEADER], 'miss')
+
+    def test_content_change_invalidates(self):
+        for name in ('index', 'group', 'profile', 'post'):
+            self.get(self.urls[name])
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Мяу')
+        for name in ('index', 'group', 'profile', 'post'):
+            with self.subTest(page=name):
+                self.assertEqual(self.get(self.urls[name])[HEADER], 'miss')
+        self.assertContains(self.get(self.urls['post']), 'Мяу')
+
+    def test_follow_invalidates_profile(self):
+        self.get(self.urls['profile'])
+        Follow.objects.create(user=self.reader, author=self.leo)
+        self.assertEqual(self.get(self.urls['profile'])[HEADER], 'miss')
+
+    def test_requests_with_cookies_bypass_cache(self):
+        url = self.urls['index']
+        self.get(url)
+        client = Client()
+        client.force_login(self.reader)
+        self.assertFalse(client.get(url).has_header(HEADER))
+        client = Client()
+        client.cookies['csrftoken'] = 'x' * 32
+        self.assertFalse(client.get(url).has_header(HEADER))
+
+    def test_other_views_are_not_cached(self):
+        self.assertFalse(self.get(reverse('posts:search')).has_header(HEADER))
+
+    def test_missing_pages_are_not_stored(self):
+        url = reverse('posts:profile', args=['nobody'])
+        self.assertEqual(self.get(url).status_code, 404)
+        User.objects.create_user(username='nobody')
+        self.assertEqual(self.get(url).status_code, 200)
+
+    def test_hit_honours_etag(self):
+        url = self.urls['group']
+        etag = self.get(url)['ETag']
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response[HEADER], 'hit')
+
+    def test_pages_with_late_cookies_are_not_stored(self):
+        """Страницу, которой CSRF- или Session-middleware поставят cookie
+        уже после PageCacheMiddleware, не сохраняют."""
+        def store(prepare):
+            request = RequestFactory().get('/')
+            request.session = SessionStore()
+            request._page_cache_key = 'pages:late-cookies'
+            prepare(request)
+            cache.delete(request._page_cache_key)
+            PageCacheMiddleware(lambda request: HttpResponse('ok'))(request)
+            return cache.get(request._page_cache_key) is not None
+
+        self.assertTrue(store(lambda request: request.session.get('key')))
+        self.assertFalse(store(lambda request: request.META.update(
+            CSRF_COOKIE_USED=True)))
+        self.assertFalse(store(lambda request: request.session.update(
+            {'key': 'value'})))
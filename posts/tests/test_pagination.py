@@ -0,0 +1,145 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Post
+from posts.pagination import (CursorPage, decode_cursor, encode_cursor,
+                              page_window)
+
+
+class CursorPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='john')
+        for num in range(25):
+            Post.objects.create(author=cls.user, text=f'Пост {num}')
+        cls.expected = list(Post.objects.values_list('id', flat=True))
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.url = reverse('posts:profile', kwargs={'username': 'john'})
+
+    def test_without_cursor_uses_page_numbers(self):
+        """Без ?after=/?before= используется обычный Paginator."""
+        response = self.guest_client.get(self.url)
+        self.assertIs(type(response.context['page']), Page)
+
+    def test_walk_forward_and_back(self):
+        """Переход по курсорам проходит все посты по порядку и обратно."""
+        first = self.guest_client.get(self.url).context['page']
+        seen = [post.id for post in first]
+        cursor = encode_cursor(first[-1].pub_date, first[-1].id)
+        pages = []
+        while cursor:
+            page = self.guest_client.get(
+                self.url, {'after': cursor}).context['page']
+            self.assertIsInstance(page, CursorPage)
+            pages.append(page)
+            seen += [post.id for post in page]
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.expected)
+
+        last = pages[-1]
+        back = self.guest_client.get(
+            self.url, {'before': last.previous_cursor}).context['page']
+        self.assertEqual([post.id for post in back],
+                         [post.id for post in pages[-2]])
+
+    def test_next_link_uses_cursor(self):
+        """«Следующая» на странице по номеру ведёт по курсору ?after=."""
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.user)
+        self.guest_client.force_login(reader)
+        for url in (reverse('posts:index'), self.url,
+                    reverse('posts:follow_index')):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                link = re.search(r'href="\?after=([^"]+)"',
+                                 response.content.decode())
+                self.assertIsNotNone(link)
+                page = self.guest_client.get(
+                    url, {'after': link.group(1)}).context['page']
+                self.assertEqual([post.id for post in page],
+                                 self.expected[10:20])
+
+    def test_cursor_page_has_no_count(self):
+        """Страница по курсору не выполняет COUNT(*)."""
+        post = Post.objects.all()[9]
+        cursor = encode_cursor(post.pub_date, post.id)
+        with CaptureQueriesContext(connection) as context:
+            self.guest_client.get(reverse('posts:index'), {'after': cursor})
+        self.assertFalse(
+            [query for query in context if 'COUNT(*)' in query['sql']])
+
+    def test_broken_cursor(self):
+        """Испорченный курсор отдаёт первую страницу."""
+        self.assertIsNone(decode_cursor('не-курсор'))
+        page = self.guest_client.get(
+            self.url, {'after': 'bm90LWEtY3Vyc29y'}).context['page']
+        self.assertEqual([post.id for post in page], self.expected[:10])
+        self.assertFalse(page.has_previous())
+
+
+# повторный запрос должен дойти до view, а не до кеша страниц
+@override_settings(PAGE_CACHE_VIEWS=[])
+class CountAndWindowTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='john')
+        for num in range(25):
+            Post.objects.create(author=cls.user, text=f'Пост {num}')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.context['paginator'].count, 25)
+        return [query for query in context if 'COUNT(*)' in query['sql']]
+
+    def test_profile_uses_stored_counter(self):
+        """Профиль берёт число постов из хранимого счётчика."""
+        url = reverse('posts:profile', kwargs={'username': 'john'})
+        self.assertEqual(self.count_queries(url), [])
+
+    def test_index_count_is_cached(self):
+        """Главная считает посты один раз до следующего изменения."""
+        url = reverse('posts:index')
+        self.assertEqual(len(self.count_queries(url)), 1)
+        self.assertEqual(self.count_queries(url), [])
+        Post.objects.create(author=self.user, text='Ещё')
+        Post.objects.filter(text='Ещё').delete()
+        self.assertEqual(len(self.count_queries(url)), 1)
+
+    def test_page_window(self):
+        """Ссылки выводятся только для страниц рядом с текущей."""
+        paginator = Paginator(range(50000 * 10), 10)
+        self.assertEqual(page_window(paginator.page(1)), [1, 2, 3, None, 50000])
+        self.assertEqual(page_window(paginator.page(100)),
+                         [1, None, 98, 99, 100, 101, 102, None, 50000])
+        self.assertEqual(page_window(paginator.page(50000)),
+                         [1, None, 49998, 49999, 50000])
+        self.assertEqual(page_window(Paginator(range(30), 10).page(2)),
+                         [1, 2, 3])
+
+    def test_paginator_renders_window(self):
+        """Шаблон пагинатора выводит окно страниц, а не все ссылки."""
+        for num in range(100):
+            Post.objects.create(author=self.user, text=f'Доп {num}')
+        response = self.guest_client.get(reverse('posts:index'), {'page': 6})
+        content = response.content.decode()
+        self.assertIn('page=8', content)
+        self.assertNotIn('page=9"', content)
+        self.assertIn('page=13', content)
+        self.assertIn('&hellip;', content)
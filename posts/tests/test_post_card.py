@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.management.commands.benchmark_templates import PAGES, make_posts
+from posts.models import Group, Post
+from posts.templatetags.post_tags import fast_reverse
+
+
+class PostCardTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo.t+1@ya')
+        cls.group = Group.objects.create(title='Кошки', slug='cats')
+        cls.post = Post.objects.create(text='Строка\nещё', author=cls.author,
+                                       group=cls.group)
+
+    def render(self, user):
+        template = Template('{% load post_tags %}{% post_card post %}')
+        post = Post.objects.for_feed().get(pk=self.post.pk)
+        return template.render(Context({'post': post, 'user': user}))
+
+    def test_fast_reverse_matches_reverse(self):
+        """Подстановка в разобранный шаблон адреса даёт то же, что reverse."""
+        for username in ('leo', 'leo.t+1@ya', 'мария', 'a b%'):
+            with self.subTest(username=username):
+                self.assertEqual(
+                    fast_reverse('posts:post', username=username, post_id=7),
+                    reverse('posts:post', args=[username, 7]))
+        self.assertEqual(fast_reverse('posts:group_posts', slug='cats'),
+                         reverse('posts:group_posts', args=['cats']))
+
+    def test_card_links(self):
+        html = self.render(AnonymousUser())
+        username = self.author.username
+        self.assertIn(reverse('posts:profile', args=[username]), html)
+        self.assertIn(reverse('posts:post', args=[username, self.post.pk]),
+                      html)
+        self.assertIn(reverse('posts:group_posts', args=['cats']), html)
+        self.assertIn('Строка<br>ещё', html)
+        self.assertNotIn('Редактировать', html)
+
+    def test_edit_link_only_for_author(self):
+        html = self.render(self.author)
+        self.assertIn(
+            reverse('posts:post_edit', args=[self.author.username,
+                                             self.post.pk]), html)
+
+    def test_template_benchmark_runs(self):
+        out = StringIO()
+        call_command('benchmark_templates', cards=[2], repeat=1, stdout=out)
+        rows = {tuple(line.split()[1:3])
+                for line in out.getvalue().splitlines()[1:]}
+        self.assertEqual(rows, {(page, loader)
+                                for page in ('post_card', 'include')
+                                for loader in ('plain', 'cached')})
+
+    def test_benchmark_variants_render_same_cards(self):
+        """{% include %} в замере выдаёт ту же разметку, что и post_card."""
+        context = {'page': make_posts(5),
+                   'user': User(id=1, username='author1')}
+        html = [' '.join(Template(source).render(Context(context)).split())
+                for source in PAGES.values()]
+        self.assertIn('Редактировать', html[0])
+        self.assertEqual(html[0], html[1])
@@ -0,0 +1,98 @@
+import re
+import unittest
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from posts.pagination import encode_cursor
+
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?\w+(?! USING)( AS \w+)?$')
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN в SQLite')
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='john')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='описание')
+        for num in range(15):
+            post = Post.objects.create(text=f'Пост {num}', author=cls.user,
+                                       group=cls.group if num % 2 else None)
+            Comment.objects.create(post=post, author=cls.reader, text='Да')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.post = post
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_views_use_indexes(self):
+        """Запросы страниц не сканируют таблицы целиком
+        и не сортируют через временное B-дерево."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+            reverse('posts:post', kwargs={'username': self.user.username,
+                                          'post_id': self.post.id}),
+            reverse('posts:follow_index'),
+            reverse('posts:trending'),
+        )
+        for url in urls:
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            for query in context:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                for step in self.plan(query['sql']):
+                    with self.subTest(url=url, sql=query['sql'], step=step):
+                        self.assertIsNone(FULL_SCAN.search(step))
+                        self.assertNotIn('TEMP B-TREE', step)
+                        self.assertNotIn('AUTOMATIC', step)
+
+    def test_cursor_pages_search_a_range(self):
+        """?after=/?before= ищут по диапазону pub_date, а не проходят все
+        более новые строки (лента подписок — по posts_timelineentry)."""
+        middle = Post.objects.order_by('-pub_date', '-pk')[7]
+        cursor = encode_cursor(middle.pub_date, middle.pk)
+        feeds = {
+            reverse('posts:index'): 'posts_post_pub_date_id_idx',
+            reverse('posts:profile', kwargs={'username': self.user.username}):
+                'author_id=? AND pub_date',
+            reverse('posts:follow_index'):
+                'posts_timeline_feed_idx (user_id=? AND pub_date',
+        }
+        for url, index in feeds.items():
+            for param, bound in (('after', '<'), ('before', '>')):
+                with self.subTest(url=url, param=param):
+                    with CaptureQueriesContext(connection) as context:
+                        response = self.client.get(f'{url}?{param}={cursor}')
+                    self.assertEqual(response.status_code, 200)
+                    # по 7 постов по обе стороны от восьмого из 15
+                    self.assertEqual(len(response.context['page']), 7)
+                    # запрос самой страницы: PAGE_SIZE + 1 строк
+                    steps = [step for query in context
+                             if 'ORDER BY' in query['sql']
+                             and query['sql'].endswith('LIMIT 11')
+                             for step in self.plan(query['sql'])]
+                    self.assertTrue(any(
+                        'SEARCH' in step and index in step
+                        and f'pub_date{bound}?' in step for step in steps),
+                        steps)
+                    self.assertFalse(any('TEMP B-TREE' in step
+                                         for step in steps), steps)
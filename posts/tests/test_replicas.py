@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, router
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from yatube.routers import PIN_COOKIE
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'реплика — файл SQLite')
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTest(TransactionTestCase):
+    """Основная база — тестовая, реплика — отдельный файл SQLite,
+    который заполняется sync_replicas и дальше не обновляется."""
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        connections.databases['replica'] = {
+            **connections.databases['default'],
+            'NAME': os.path.join(cls.directory, 'replica.sqlite3'),
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='leo')
+        self.reader = User.objects.create_user(username='reader')
+        Post.objects.create(text='Старый пост', author=self.author)
+        call_command('sync_replicas', stdout=StringIO())
+
+    def test_feeds_read_from_replica(self):
+        Post.objects.create(text='Ещё не на реплике', author=self.author)
+        for url in (reverse('posts:index'),
+                    reverse('posts:profile', args=['leo'])):
+            response = self.client.get(url)
+            self.assertContains(response, 'Старый пост')
+            self.assertNotContains(response, 'Ещё не на реплике')
+
+    def test_primary_pinned_after_write(self):
+        self.client.force_login(self.reader)
+        response = self.client.post(reverse('posts:new_post'),
+                                    {'text': 'Свежий пост'}, follow=True)
+        self.assertIn(PIN_COOKIE, self.client.cookies)
+        self.assertContains(response, 'Свежий пост')
+        self.assertFalse(Post.objects.using('replica').filter(
+            text='Свежий пост').exists())
+
+    def test_pinned_client_reads_primary(self):
+        Post.objects.create(text='Ещё не на реплике', author=self.author)
+        self.client.cookies[PIN_COOKIE] = '1'
+        self.assertContains(self.client.get(reverse('posts:index')),
+                            'Ещё не на реплике')
+
+    def test_reads_without_writes_are_not_pinned(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_session_read_from_primary(self):
+        """Сессии нет на реплике, но пользователь остаётся залогинен."""
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['user'], self.reader)
+
+    def test_replica_pages_do_not_outlive_lag(self):
+        """Страница и фрагменты, собранные с отставшей реплики, не
+        сохраняются под новой версией и не получают ETag."""
+        Post.objects.create(text='Ещё не на реплике', author=self.author)
+        index = reverse('posts:index')
+        profile = reverse('posts:profile', args=['leo'])
+        self.assertNotContains(Client().get(index), 'Ещё не на реплике')
+        self.assertFalse(Client().get(profile).has_header('ETag'))
+        pinned = Client()
+        pinned.cookies[PIN_COOKIE] = '1'
+        self.assertContains(pinned.get(index), 'Ещё не на реплике')
+        self.assertTrue(pinned.get(profile).has_header('ETag'))
+        call_command('sync_replicas', stdout=StringIO())
+        self.assertContains(Client().get(index), 'Ещё не на реплике')
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(router.db_for_write(Post), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
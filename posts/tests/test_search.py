@@ -0,0 +1,70 @@
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from posts.search import to_match
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='john')
+        cls.cats = Post.objects.create(text='Кошки любят молоко',
+                                       author=cls.user)
+        cls.dogs = Post.objects.create(text='Собаки любят кости',
+                                       author=cls.user)
+        for num in range(12):
+            Post.objects.create(text=f'Про котов, выпуск {num}',
+                                author=cls.user)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query, **params):
+        response = self.guest_client.get(reverse('posts:search'),
+                                         {'q': query, **params})
+        return response.context['page']
+
+    def test_search_finds_posts(self):
+        """Поиск находит посты по словам и префиксам без учёта регистра."""
+        self.assertEqual([p.id for p in self.search('молоко')], [self.cats.id])
+        self.assertEqual(len(self.search('ЛЮБЯТ')), 2)
+        self.assertEqual([p.id for p in self.search('соба')], [self.dogs.id])
+        self.assertEqual(len(self.search('')), 0)
+
+    def test_index_follows_edits(self):
+        """Триггеры обновляют индекс при правке и удалении поста."""
+        cats = Post.objects.get(pk=self.cats.pk)
+        cats.text = 'Кошки любят сметану'
+        cats.save()
+        self.assertEqual(len(self.search('молоко')), 0)
+        self.assertEqual(len(self.search('сметану')), 1)
+        Post.objects.get(pk=self.dogs.pk).delete()
+        self.assertEqual(len(self.search('кости')), 0)
+
+    def test_search_is_paginated(self):
+        """Выдача листается и сохраняет запрос в ссылках на страницы."""
+        page = self.search('котов')
+        self.assertEqual(len(page), 10)
+        self.assertEqual(page.paginator.count, 12)
+        self.assertEqual(len(self.search('котов', page=2)), 2)
+        response = self.guest_client.get(reverse('posts:search'),
+                                         {'q': 'котов'})
+        self.assertContains(response, '?q=%D0%BA%D0%BE%D1%82%D0%BE%D0%B2&amp;page=2')
+
+    def test_query_syntax_is_escaped(self):
+        """Служебный синтаксис FTS5 во вводе не ломает поиск."""
+        self.assertEqual(to_match('"молоко" OR *'), '"молоко"* "OR"*')
+        self.assertEqual(len(self.search('"молоко*(')), 1)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт по полнотекстовому индексу."""
+        request = RequestFactory().get('/')
+        admin_model = site._registry[Post]
+        queryset, distinct = admin_model.get_search_results(
+            request, Post.objects.all(), 'молоко')
+        self.assertIn('posts_post_fts', str(queryset.query))
+        self.assertEqual(list(queryset), [self.cats])
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from posts.caching import CONTENT, FOLLOWS, get_version
+from posts.models import Post
+
+PRAGMAS = settings.DATABASES['default'].get('OPTIONS', {}).get('pragmas', {})
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'настройки SQLite')
+class SqliteTuningTest(TransactionTestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self):
+        connection.close()
+        self.assertEqual(self.pragma('busy_timeout'), PRAGMAS['busy_timeout'])
+        # 1 — NORMAL
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('cache_size'), PRAGMAS['cache_size'])
+
+    def test_transactions_take_write_lock_up_front(self):
+        """atomic() на файловой базе начинается с BEGIN IMMEDIATE."""
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = connections['default'].__class__(
+                {**connection.settings_dict,
+                 'NAME': os.path.join(directory, 'db.sqlite3')}, 'file')
+            try:
+                with CaptureQueriesContext(wrapper) as context:
+                    wrapper._start_transaction_under_autocommit()
+                wrapper.rollback()
+            finally:
+                wrapper.close()
+        self.assertEqual(context[0]['sql'], 'BEGIN IMMEDIATE')
+
+    def test_concurrency_benchmark(self):
+        author = User.objects.create_user(username='leo')
+        for num in range(3):
+            User.objects.create_user(username=f'reader{num}')
+        Post.objects.create(text='Пост', author=author)
+        cache.set('sentinel', 1)
+        versions = [get_version(name) for name in (CONTENT, FOLLOWS)]
+        out = StringIO()
+        with mock.patch('posts.management.commands.benchmark_concurrency.'
+                        'override_settings', wraps=override_settings) as mode:
+            call_command('benchmark_concurrency', workers=2, seconds=0.5,
+                         stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[1].startswith('stock'))
+        self.assertTrue(lines[2].startswith('tuned'))
+        self.assertIn('Прирост', lines[3])
+        self.assertEqual(Post.objects.get().comments_count, 0)
+        # общий кеш не тронут, у каждого режима свой пустой
+        self.assertEqual(cache.get('sentinel'), 1)
+        self.assertEqual([get_version(name) for name in (CONTENT, FOLLOWS)],
+                         versions)
+        locations = [call[1]['CACHES']['default']['LOCATION']
+                     for call in mode.call_args_list]
+        self.assertEqual(len(set(locations)), 2)
@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import Follow, Post
+
+MEDIA_ROOT = tempfile.mkdtemp()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B')
+
+
+class ImmediateExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='john')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def upload(self, name):
+        return SimpleUploadedFile(name=name, content=SMALL_GIF,
+                                  content_type='image/gif')
+
+    def test_render_does_not_resize(self):
+        """Страница без готовой миниатюры показывает оригинал,
+        а не создаёт миниатюру во время запроса."""
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   image=self.upload('plain.gif'))
+        with mock.patch.object(thumbnails.backend, 'get_thumbnail') as create:
+            content = self.client.get(reverse('posts:index')).content.decode()
+        create.assert_not_called()
+        self.assertIn(post.image.url, content)
+        self.assertIsNone(thumbnails.ready_thumbnail(post.image))
+
+    def test_ready_thumbnail_reaches_cached_pages(self):
+        """Готовая миниатюра сбрасывает фрагменты главной и лент
+        подписчиков, собранные с оригиналом."""
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.user)
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   image=self.upload('late.gif'))
+        reader_client = Client()
+        reader_client.force_login(reader)
+        pages = ((self.client, reverse('posts:index')),
+                 (reader_client, reverse('posts:follow_index')))
+        for client, url in pages:
+            self.assertIn(post.image.url, client.get(url).content.decode())
+        thumbnails.refresh(post.pk, post.image.name)
+        thumbnail = thumbnails.ready_thumbnail(post.image)
+        for client, url in pages:
+            with self.subTest(url=url):
+                self.assertIn(thumbnail.url,
+                              client.get(url).content.decode())
+
+    @mock.patch('posts.thumbnails.transaction.on_commit', lambda func: func())
+    def test_form_save_generates_thumbnails(self):
+        """После сохранения формы с картинкой миниатюра создаётся — в пуле
+        потоков или, при POSTS_THUMBNAIL_WORKERS = 0, сразу — и попадает
+        в шаблон."""
+        for workers in (2, 0):
+            with self.subTest(workers=workers), \
+                    override_settings(POSTS_THUMBNAIL_WORKERS=workers), \
+                    mock.patch('posts.thumbnails._get_executor',
+                               side_effect=ImmediateExecutor) as executor:
+                text = f'С картинкой {workers}'
+                self.client.post(reverse('posts:new_post'), {
+                    'text': text, 'image': self.upload(f'new{workers}.gif')})
+                self.assertEqual(executor.called, bool(workers))
+                post = Post.objects.get(text=text)
+                thumbnail = thumbnails.ready_thumbnail(post.image)
+                self.assertIsNotNone(thumbnail)
+                self.assertTrue(thumbnail.exists())
+                content = self.client.get(
+                    reverse('posts:index')).content.decode()
+                self.assertIn(thumbnail.url, content)
+
+    def test_regenerate_skips_fresh_thumbnails(self):
+        """Повторная регенерация пропускает свежие миниатюры,
+        а --force пересоздаёт их."""
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   image=self.upload('batch.gif'))
+        name = post.image.name
+        self.assertEqual(thumbnails.regenerate(name), 'created')
+        self.assertEqual(thumbnails.regenerate(name), 'skipped')
+        self.assertEqual(thumbnails.regenerate(name, force=True), 'created')
+        self.assertEqual(thumbnails.regenerate('posts/нет.gif'), 'missing')
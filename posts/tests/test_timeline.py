@@ -0,0 +1,80 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry
+
+
+class TimelineTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='john')
+        self.other = User.objects.create_user(username='other')
+        self.reader = User.objects.create_user(username='reader')
+        self.client = Client()
+        self.client.force_login(self.reader)
+        for num in range(3):
+            Post.objects.create(text=f'Старый {num}', author=self.author)
+        Post.objects.create(text='Чужой', author=self.other)
+
+    def feed(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return [post.text for post in response.context['page']]
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка добавляет в ленту старые посты автора, отписка убирает."""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.feed(), ['Старый 2', 'Старый 1', 'Старый 0'])
+        follow.delete()
+        self.assertEqual(self.feed(), [])
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+
+    def test_new_post_fans_out(self):
+        """Новый пост попадает только в ленты подписчиков автора."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.create(text='Свежий', author=self.author)
+        Post.objects.create(text='Ещё чужой', author=self.other)
+        self.assertEqual(self.feed()[0], 'Свежий')
+        self.assertNotIn('Ещё чужой', self.feed())
+        self.assertFalse(TimelineEntry.objects.filter(user=self.other))
+
+    def test_timeline_is_capped(self):
+        """В ленте хранится не больше TIMELINE_LENGTH свежих записей."""
+        with mock.patch.object(timeline, 'TIMELINE_LENGTH', 2):
+            Follow.objects.create(user=self.reader, author=self.author)
+            Post.objects.create(text='Свежий', author=self.author)
+        self.assertEqual(self.feed(), ['Свежий', 'Старый 2'])
+
+    def test_fan_out_queries_do_not_grow_with_followers(self):
+        """Ленты всех подписчиков обрезаются одним DELETE."""
+        post = Post.objects.create(text='Свежий', author=self.author)
+
+        def queries():
+            with CaptureQueriesContext(connection) as context:
+                timeline.fan_out(post)
+            return len(context)
+
+        Follow.objects.create(user=self.reader, author=self.author)
+        before = queries()
+        for num in range(5):
+            Follow.objects.create(
+                user=User.objects.create_user(username=f'fan{num}'),
+                author=self.author)
+        with mock.patch.object(timeline, 'TIMELINE_LENGTH', 2):
+            self.assertEqual(queries(), before)
+        for user_id in Follow.objects.values_list('user_id', flat=True):
+            self.assertEqual(
+                TimelineEntry.objects.filter(user_id=user_id).count(), 2)
+
+    def test_rebuild_command(self):
+        """rebuild_timelines восстанавливает ленты по подпискам."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(len(self.feed()), 3)
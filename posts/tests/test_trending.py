@@ -0,0 +1,72 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Comment, Post, TrendingEpoch, TrendingScore
+
+
+class TrendingTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='leo')
+        self.reader = User.objects.create_user(username='reader')
+        self.quiet = Post.objects.create(text='Тихий', author=self.author)
+        self.busy = Post.objects.create(text='Обсуждаемый', author=self.author)
+        self.old = Post.objects.create(text='Старый', author=self.author)
+
+    def comment(self, post, times=1):
+        for _ in range(times):
+            Comment.objects.create(post=post, author=self.reader, text='Да')
+
+    def score(self, post):
+        return TrendingScore.objects.get(post=post).score
+
+    def test_comments_raise_score(self):
+        self.comment(self.busy, 3)
+        self.comment(self.quiet)
+        self.assertGreater(self.score(self.busy), self.score(self.quiet))
+        self.assertFalse(TrendingScore.objects.filter(post=self.old).exists())
+
+    def test_recent_activity_outweighs_old(self):
+        """Комментарий сейчас весит вдвое больше, чем период полураспада назад."""
+        now = timezone.now()
+        trending.record(self.old.pk, moment=now - timedelta(
+            seconds=trending.HALF_LIFE))
+        trending.record(self.busy.pk, moment=now)
+        self.assertAlmostEqual(self.score(self.busy) / self.score(self.old), 2)
+
+    def test_rebase_keeps_order_and_drops_cold_posts(self):
+        now = timezone.now()
+        trending.record(self.busy.pk, moment=now)
+        trending.record(self.quiet.pk, moment=now - timedelta(
+            seconds=trending.HALF_LIFE / 2))
+        trending.record(self.old.pk, moment=now - timedelta(
+            seconds=trending.HALF_LIFE * 10))
+        ratio = self.score(self.busy) / self.score(self.quiet)
+        removed = trending.rebase(now)
+        self.assertEqual(removed, 1)
+        self.assertEqual(TrendingEpoch.objects.get().started, now)
+        self.assertAlmostEqual(self.score(self.busy), 1)
+        self.assertAlmostEqual(self.score(self.busy) / self.score(self.quiet),
+                               ratio)
+
+    def test_rebuild_matches_incremental(self):
+        self.comment(self.busy, 2)
+        self.comment(self.quiet)
+        incremental = list(trending.trending_posts())
+        out = StringIO()
+        call_command('update_trending', rebuild=True, stdout=out)
+        self.assertEqual(list(trending.trending_posts()), incremental)
+        self.assertAlmostEqual(self.score(self.busy), 2, places=3)
+
+    def test_trending_page(self):
+        self.comment(self.quiet)
+        self.comment(self.busy, 2)
+        response = Client().get(reverse('posts:trending'))
+        self.assertEqual([post.text for post in response.context['posts']],
+                         ['Обсуждаемый', 'Тихий'])
@@ -8,8 +8,11 @@ from django.contrib.auth import get_user_model
 from django import forms
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from posts.models import Post, Group, Follow
+from posts.models import Post, Group, Follow, Comment
+from posts.pagination import COMMENTS_PAGE_SIZE
 
 
 class ViewsTest(TestCase):
@@ -206,3 +209,77 @@ class ViewsTest(TestCase):
             reverse('posts:add_comment', kwargs={'username': self.user.username,
                                                  'post_id': self.post.id}), data=comment)
         self.assertEqual(response.status_code, 302)
+
+    def test_feed_queries_do_not_depend_on_posts_count(self):
+        """Число запросов на страницах ленты не зависит от числа постов."""
+        author = get_user_model().objects.create_user(username='writer')
+        group = Group.objects.create(title='Лента', slug='feed-group',
+                                     description='описание')
+        urls = (
+            reverse('posts:profile', kwargs={'username': author.username}),
+            reverse('posts:group_posts', kwargs={'slug': group.slug}),
+        )
+
+        def add_post():
+            post = Post.objects.create(text='Пост', author=author, group=group)
+            Comment.objects.create(post=post, author=self.user, text='Коммент')
+
+        add_post()
+        queries = {}
+        for url in urls:
+            with CaptureQueriesContext(connection) as context:
+                self.guest_client.get(url)
+            queries[url] = len(context)
+        for _ in range(5):
+            add_post()
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    self.guest_client.get(url)
+                self.assertEqual(len(context), queries[url])
+
+
+class PostViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+        Comment.objects.bulk_create([
+            Comment(post=cls.post, author=cls.reader, text=f'Коммент {num}')
+            for num in range(COMMENTS_PAGE_SIZE + 5)])
+        Post.objects.filter(pk=cls.post.pk).update(
+            comments_count=COMMENTS_PAGE_SIZE + 5)
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse('posts:post', args=['leo', self.post.id])
+
+    def test_comments_are_paginated(self):
+        """Комментарии выводятся страницами, авторы — тем же запросом."""
+        # ETag, пост с автором и группой, страница комментариев
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PAGE_SIZE)
+        self.assertEqual(comments[0].text, 'Коммент 0')
+        last = self.client.get(self.url, {'page': 2}).context['comments']
+        self.assertEqual([c.text for c in last],
+                         [f'Коммент {num}' for num in range(
+                             COMMENTS_PAGE_SIZE, COMMENTS_PAGE_SIZE + 5)])
+
+    def test_wrong_author_is_404(self):
+        response = self.client.get(
+            reverse('posts:post', args=['reader', self.post.id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_new_comment_redirects_to_its_page(self):
+        self.client.force_login(self.reader)
+        response = self.client.post(
+            reverse('posts:add_comment', args=['leo', self.post.id]),
+            {'text': 'Новый'})
+        comment = Comment.objects.get(text='Новый')
+        self.assertRedirects(
+            response, f'{self.url}?page=2#comment_{comment.id}',
+            fetch_redirect_response=False)
@@ -0,0 +1,139 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from .caching import CONTENT, bump_versions, feed_version_name
+from .models import TimelineEntry
+
+logger = logging.getLogger(__name__)
+
+# все размеры, в которых картинки постов выводятся в шаблонах
+POST_THUMBNAILS = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+
+_executor = None
+
+
+class PostThumbnailBackend(ThumbnailBackend):
+    """Умеет отдавать только уже готовую миниатюру, не создавая её."""
+
+    def _normalize_options(self, source, options):
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def get_thumbnail_file(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        options = self._normalize_options(source, options)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        return default.kvstore.get(
+            self.get_thumbnail_file(file_, geometry_string, **options))
+
+
+backend = PostThumbnailBackend()
+
+
+def ready_thumbnail(image, size='card'):
+    if not image:
+        return None
+    geometry, options = POST_THUMBNAILS[size]
+    return backend.get_ready_thumbnail(image, geometry, **options)
+
+
+def generate(name):
+    for geometry, options in POST_THUMBNAILS.values():
+        backend.get_thumbnail(name, geometry, **options)
+
+
+def is_up_to_date(name):
+    source_modified = default.storage.get_modified_time(name)
+    for geometry, options in POST_THUMBNAILS.values():
+        thumbnail = backend.get_ready_thumbnail(name, geometry, **options)
+        if thumbnail is None or not thumbnail.exists():
+            return False
+        if default.storage.get_modified_time(thumbnail.name) < source_modified:
+            return False
+    return True
+
+
+def regenerate(name, force=False):
+    """Пересоздаёт устаревшие миниатюры картинки.
+
+    Возвращает 'created', 'skipped' или 'missing'."""
+    if not default.storage.exists(name):
+        return 'missing'
+    if not force and is_up_to_date(name):
+        return 'skipped'
+    for geometry, options in POST_THUMBNAILS.values():
+        thumbnail = backend.get_thumbnail_file(name, geometry, **options)
+        default.kvstore.delete(thumbnail, delete_thumbnails=False)
+        if thumbnail.exists():
+            default.storage.delete(thumbnail.name)
+    generate(name)
+    return 'created'
+
+
+def publish(post_id):
+    """Сдвигает версии страниц, где есть карточка поста: фрагменты и
+    страницы из кеша, собранные до миниатюры, показывали бы оригинал."""
+    feeds = TimelineEntry.objects.filter(post_id=post_id).values_list(
+        'user_id', flat=True)
+    bump_versions(CONTENT, *[feed_version_name(user_id) for user_id in feeds])
+
+
+def refresh(post_id, name):
+    generate(name)
+    publish(post_id)
+
+
+def _refresh_logged(post_id, name):
+    try:
+        refresh(post_id, name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+
+
+def _generate_in_background(post_id, name):
+    try:
+        _refresh_logged(post_id, name)
+    finally:
+        connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.POSTS_THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails')
+    return _executor
+
+
+def schedule(post):
+    """После коммита создаёт миниатюры картинки поста в фоновом потоке,
+    а при POSTS_THUMBNAIL_WORKERS = 0 — сразу, в потоке запроса."""
+    if not post.image:
+        return
+    name = post.image.name
+    if not settings.POSTS_THUMBNAIL_WORKERS:
+        transaction.on_commit(lambda: _refresh_logged(post.pk, name))
+        return
+    transaction.on_commit(lambda: _get_executor().submit(
+        _generate_in_background, post.pk, name))
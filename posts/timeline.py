@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.db import connection
+
+from .models import Follow, Post, TimelineEntry
+
+TIMELINE_LENGTH = getattr(settings, 'POSTS_TIMELINE_LENGTH', 1000)
+# не больше параметров в одном запросе, чем позволяют старые сборки SQLite
+BATCH_SIZE = 500
+
+
+def _entry(user_id, post):
+    return TimelineEntry(user_id=user_id, post_id=post.pk,
+                         author_id=post.author_id, pub_date=post.pub_date)
+
+
+def trim(*user_ids):
+    """Оставляет в лентах пользователей только TIMELINE_LENGTH свежих
+    записей: один DELETE на пачку лент, номер строки считается окном по
+    user_id, а не отдельным OFFSET-запросом на каждого подписчика."""
+    entries = TimelineEntry._meta.db_table
+    user_ids = list(user_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(user_ids), BATCH_SIZE):
+            batch = user_ids[start:start + BATCH_SIZE]
+            cursor.execute(
+                f'DELETE FROM {entries} WHERE id IN ('
+                'SELECT id FROM ('
+                'SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id '
+                'ORDER BY pub_date DESC, post_id DESC) AS position '
+                f'FROM {entries} '
+                f'WHERE user_id IN ({", ".join(["%s"] * len(batch))})'
+                ') WHERE position > %s)',
+                [*batch, TIMELINE_LENGTH])
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора.
+
+    Возвращает id пользователей, чьи ленты изменились."""
+    followers = list(Follow.objects.filter(author_id=post.author_id)
+                     .values_list('user_id', flat=True))
+    TimelineEntry.objects.bulk_create(
+        [_entry(user_id, post) for user_id in followers],
+        batch_size=500, ignore_conflicts=True)
+    trim(*followers)
+    return followers
+
+
+def backfill(user_id, author_id):
+    posts = Post.objects.filter(author_id=author_id).only(
+        'pk', 'author_id', 'pub_date')[:TIMELINE_LENGTH]
+    TimelineEntry.objects.bulk_create(
+        [_entry(user_id, post) for post in posts],
+        batch_size=500, ignore_conflicts=True)
+    trim(user_id)
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild(user_id):
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    authors = list(Follow.objects.filter(user_id=user_id).values_list(
+        'author_id', flat=True))
+    for author_id in authors:
+        backfill(user_id, author_id)
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Comment, Post, TrendingEpoch, TrendingScore
+
+HALF_LIFE = getattr(settings, 'POSTS_TRENDING_HALF_LIFE', 6 * 60 * 60)
+TRENDING_SIZE = getattr(settings, 'POSTS_TRENDING_SIZE', 20)
+
+WEIGHTS = {'comment': 1.0, 'view': 0.05}
+# после переноса эпохи оценки ниже этой (в нынешних единицах) удаляются
+MIN_SCORE = 0.01
+# 2 ** 512 ещё далеко от переполнения float
+MAX_HALF_LIVES = 512
+
+
+def _epoch():
+    epoch = TrendingEpoch.objects.filter(pk=1).values_list(
+        'started', flat=True).first()
+    if epoch is None:
+        epoch, _ = TrendingEpoch.objects.get_or_create(
+            pk=1, defaults={'started': timezone.now()})
+        epoch = epoch.started
+    return epoch
+
+
+def _growth(moment, epoch):
+    return 2 ** ((moment - epoch).total_seconds() / HALF_LIFE)
+
+
+def record(post_id, kind='comment', moment=None):
+    """Прибавляет событие к оценке поста одним UPDATE без чтения строки."""
+    moment = moment or timezone.now()
+    epoch = _epoch()
+    if (moment - epoch).total_seconds() / HALF_LIFE > MAX_HALF_LIVES:
+        rebase(moment)
+        epoch = moment
+    delta = WEIGHTS[kind] * _growth(moment, epoch)
+    scores = TrendingScore.objects.filter(post_id=post_id)
+    if not scores.update(score=F('score') + delta):
+        # строку мог успеть вставить параллельный запрос, поэтому
+        # вставка пустой оценки без конфликта и снова UPDATE
+        TrendingScore.objects.bulk_create(
+            [TrendingScore(post_id=post_id)], ignore_conflicts=True)
+        scores.update(score=F('score') + delta)
+
+
+def rebase(moment=None):
+    """Переносит эпоху в moment: все оценки затухают до текущих единиц,
+    совсем остывшие посты удаляются."""
+    moment = moment or timezone.now()
+    with transaction.atomic():
+        epoch = _epoch()
+        factor = 1 / _growth(moment, epoch)
+        TrendingScore.objects.update(score=F('score') * factor)
+        removed, _ = TrendingScore.objects.filter(
+            score__lt=MIN_SCORE).delete()
+        TrendingEpoch.objects.filter(pk=1).update(started=moment)
+    return removed
+
+
+def rebuild(moment=None):
+    """Пересчитывает оценки по комментариям за последние дни."""
+    moment = moment or timezone.now()
+    since = moment - timedelta(seconds=HALF_LIFE * 10)
+    scores = {}
+    for post_id, created in Comment.objects.filter(
+            created__gte=since).values_list('post_id', 'created').iterator():
+        scores[post_id] = scores.get(post_id, 0) + WEIGHTS['comment'] * (
+            _growth(created, moment))
+    with transaction.atomic():
+        TrendingScore.objects.all().delete()
+        TrendingEpoch.objects.update_or_create(
+            pk=1, defaults={'started': moment})
+        TrendingScore.objects.bulk_create(
+            [TrendingScore(post_id=post_id, score=score)
+             for post_id, score in scores.items() if score >= MIN_SCORE],
+            batch_size=500)
+    return len(scores)
+
+
+def trending_posts(size=TRENDING_SIZE):
+    return Post.objects.for_feed().filter(
+        trending__isnull=False).order_by('-trending__score')[:size]
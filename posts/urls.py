@@ -8,6 +8,8 @@ urlpatterns = [
     path("", views.index, name="index"),
     path("new/", views.new_post, name="new_post"),
     path("follow/", views.follow_index, name="follow_index"),
+    path("search/", views.search, name="search"),
+    path("trending/", views.trending, name="trending"),
     path('<str:username>/', views.profile, name='profile'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path('<str:username>/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -15,4 +17,9 @@ urlpatterns = [
     path("<username>/<int:post_id>/comment", views.add_comment, name="add_comment"),
     path("<str:username>/follow/", views.profile_follow, name="profile_follow"),
     path("<str:username>/unfollow/", views.profile_unfollow, name="profile_unfollow"),
+    # для скриптов: POST, ответ — счётчик или разметка комментария
+    path("<str:username>/follow/ajax/", views.ajax_follow, name="ajax_follow"),
+    path("<str:username>/unfollow/ajax/", views.ajax_unfollow, name="ajax_unfollow"),
+    path("<str:username>/<int:post_id>/comment/ajax/", views.ajax_comment,
+         name="ajax_comment"),
 ]
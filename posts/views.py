@@ -1,32 +1,71 @@
+from functools import wraps
+
 from django.urls import reverse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
 
+from . import thumbnails
+from .caching import CONTENT, can_store, feed_version_name, get_version
+from .conditions import group_condition, post_condition, profile_condition
 from .forms import PostForm, CommentForm
-from .models import Post, Group, Comment, Follow
+from .models import Post, Group, Follow, UserStats
+from .pagination import COMMENTS_PAGE_SIZE, PAGE_SIZE, cached_count, paginate
+from .search import search_posts
+from .trending import trending_posts
 
 User = get_user_model()
 
 
+def fragment_timeout(timeout):
+    """Срок {% cache %} для фрагмента с версией в ключе; 0 — собрать
+    фрагмент, не сохраняя (см. can_store)."""
+    return timeout if can_store() else 0
+
+
 def index(request):
-    latest = Post.objects.all()
-    paginator = Paginator(latest, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, "index.html", {"page": page, 'paginator': paginator})
+    latest = Post.objects.for_feed()
+    content_version = get_version(CONTENT)
+    paginator, page = paginate(request, latest, count=lambda: cached_count(
+        Post.objects.all(), version=content_version))
+    context = {
+        'page': page,
+        'paginator': paginator,
+        'content_version': content_version,
+        'index_cache_timeout': fragment_timeout(
+            settings.POSTS_INDEX_CACHE_TIMEOUT),
+    }
+    return render(request, "index.html", context)
 
 
+@group_condition
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    paginator = Paginator(group.posts.all(), 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator, page = paginate(request, group.posts.for_feed(),
+                               count=lambda: group.posts_count)
     return render(request, "group.html", {"group": group, "page": page,
                                           'paginator': paginator})
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(search_posts(query), PAGE_SIZE)
+    page = paginator.get_page(request.GET.get('page'))
+    return render(request, "search.html", {'query': query, 'page': page,
+                                           'paginator': paginator})
+
+
+def trending(request):
+    return render(request, "trending.html",
+                  {'posts': trending_posts()})
+
+
 @login_required
 def new_post(request):
     if request.method == 'POST':
@@ -35,22 +74,23 @@ def new_post(request):
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            thumbnails.schedule(post)
             return redirect('posts:index')
         return render(request, "new_post.html", {'form': form})
     form = PostForm()
     return render(request, "new_post.html", {'form': form})
 
 
+@profile_condition
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    following = False
-    if request.user.is_authenticated:
-        if Follow.objects.filter(author__following__user=request.user).exists():
-            following = True
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    post_list = author.posts.for_feed()
+    stats = getattr(author, 'stats', None)
+    paginator, page = paginate(request, post_list,
+                               count=stats and (lambda: stats.posts_count))
+    following = (request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author=author).exists())
     context = {
         'author': author,
         'page': page,
@@ -61,14 +101,21 @@ def profile(request, username):
     return render(request, 'profile.html', context=context)
 
 
+@post_condition
 def post_view(request, username, post_id):
-    author = get_object_or_404(User, username=username)
-    post = get_object_or_404(Post, id=post_id)
-    comments = Comment.objects.filter(post=post)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        id=post_id, author__username=username)
+    paginator = Paginator(
+        post.comments.select_related('author').order_by('created', 'id'),
+        COMMENTS_PAGE_SIZE)
+    paginator.count = post.comments_count
+    comments_page = paginator.get_page(request.GET.get('page'))
     form = CommentForm()
-    return render(request, 'post.html', {'post': post, 'author': author, 'form': form,
+    return render(request, 'post.html', {'post': post, 'author': post.author, 'form': form,
                                          'username': username, 'post_id': post_id,
-                                         'comments': comments})
+                                         'comments': comments_page.object_list,
+                                         'comments_page': comments_page})
 
 
 @login_required
@@ -76,9 +123,12 @@ def post_edit(request, username, post_id):
     post = get_object_or_404(Post, id=post_id, author__username=username)
     if request.user.username != post.author.username:
         return redirect('posts:post', username, post_id)
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(request.POST or None, files=request.FILES or None,
+                    instance=post)
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post)
         return redirect('posts:post', post_id=post_id, username=username)
     return render(request, 'new_post.html', {'form': form, 'post': post,
                                              'post_id': post_id, 'username': username})
@@ -106,33 +156,117 @@ def add_comment(request, username, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        # новый комментарий последний: ведём на его страницу
+        total = Post.objects.values_list('comments_count', flat=True).get(
+            pk=post.pk)
+        url = reverse('posts:post', args=[post.author, post_id])
+        page = (total - 1) // COMMENTS_PAGE_SIZE + 1
+        if page > 1:
+            url += f'?page={page}'
+        return redirect(f'{url}#comment_{comment.id}')
     return redirect('posts:post', post.author, post_id)
 
 
 @login_required
 def follow_index(request):
-    follow = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(follow, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, "follow.html", {"page": page, 'paginator': paginator})
+    # сортировка и курсор — по колонкам записи ленты из того же JOIN:
+    # страницу отдаёт её индекс без сортировки всей ленты
+    timeline = Post.objects.filter(timeline_entries__user=request.user)
+    follow = timeline.for_feed().annotate(
+        feed_date=F('timeline_entries__pub_date'),
+        feed_post=F('timeline_entries__post')).order_by(
+        '-feed_date', '-feed_post')
+    feed_version = get_version(feed_version_name(request.user.pk))
+    paginator, page = paginate(request, follow, count=lambda: cached_count(
+        timeline, version=feed_version), ordering=('feed_date', 'feed_post'))
+    context = {
+        'page': page,
+        'paginator': paginator,
+        'feed_version': feed_version,
+        'feed_cache_timeout': fragment_timeout(
+            settings.POSTS_FEED_CACHE_TIMEOUT),
+    }
+    return render(request, "follow.html", context)
+
+
+def follow_author(user, author_id):
+    """Один INSERT без предварительной проверки: повторную подписку,
+    в том числе из параллельного запроса, отсекает уникальный индекс."""
+    if user.pk == author_id:
+        return
+    try:
+        with transaction.atomic():
+            Follow.objects.create(user=user, author_id=author_id)
+    except IntegrityError:
+        pass
+
+
+def unfollow_author(user, author_id):
+    Follow.objects.filter(user=user, author_id=author_id).delete()
 
 
 @login_required
 def profile_follow(request, username):
     follow_user = get_object_or_404(User, username=username)
-    follow = Follow.objects.filter(user=request.user, author=follow_user)
-    if follow or request.user.username == username:
-        return redirect(reverse('posts:profile', kwargs={'username': username}))
-    else:
-        follow_objects = Follow.objects.create(user=request.user, author=follow_user)
-        follow_objects.save()
+    follow_author(request.user, follow_user.pk)
     return redirect(reverse('posts:profile', kwargs={'username': username}))
 
 
 @login_required
 def profile_unfollow(request, username):
     fol = get_object_or_404(User, username=username)
-    follow = Follow.objects.filter(author=fol, user=request.user)
-    follow.delete()
+    unfollow_author(request.user, fol.pk)
     return redirect(reverse('posts:profile', kwargs={'username': username}))
+
+
+def ajax_view(view):
+    """POST-only view для скриптов: вместо редиректа на логин — 401."""
+
+    @require_POST
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'detail': 'Нужна авторизация.'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _follow_state(request, username, following):
+    author_id = get_object_or_404(
+        User.objects.values_list('pk', flat=True), username=username)
+    if following:
+        follow_author(request.user, author_id)
+    else:
+        unfollow_author(request.user, author_id)
+    followers = UserStats.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True).first()
+    return JsonResponse({
+        'following': following and author_id != request.user.pk,
+        'followers_count': followers or 0,
+    })
+
+
+@ajax_view
+def ajax_follow(request, username):
+    return _follow_state(request, username, following=True)
+
+
+@ajax_view
+def ajax_unfollow(request, username):
+    return _follow_state(request, username, following=False)
+
+
+@ajax_view
+def ajax_comment(request, username, post_id):
+    """Создаёт комментарий и отдаёт только его разметку."""
+    post = get_object_or_404(Post.objects.only('id'), id=post_id,
+                             author__username=username)
+    form = CommentForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    comment = form.save(commit=False)
+    comment.author = request.user
+    comment.post = post
+    comment.save()
+    return render(request, 'comment_item.html', {'item': comment},
+                  status=201)
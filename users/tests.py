@@ -1,3 +1,70 @@
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from .backends import user_cache_key
+
+User = get_user_model()
+
+
+class CachedAuthTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='leo', password='pass')
+
+    def auth_queries(self, url=None):
+        """SQL к сессиям и пользователям во время GET-запроса."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url or reverse('posts:index'))
+        return response, [query['sql'] for query in context.captured_queries
+                          if 'django_session' in query['sql']
+                          or 'auth_user' in query['sql']]
+
+    def test_anonymous_request_skips_session_storage(self):
+        response, queries = self.auth_queries()
+        self.assertEqual(queries, [])
+        self.assertNotIn('sessionid', response.cookies)
+
+    def test_logged_in_request_reads_cache(self):
+        self.client.login(username='leo', password='pass')
+        self.auth_queries()
+        response, queries = self.auth_queries()
+        self.assertEqual(queries, [])
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_password_change_drops_cached_user(self):
+        self.client.login(username='leo', password='pass')
+        self.auth_queries()
+        self.user.set_password('new-pass')
+        self.user.save()
+        response, _ = self.auth_queries()
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_logout_drops_cached_user(self):
+        self.client.login(username='leo', password='pass')
+        self.auth_queries()
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+        self.client.get(reverse('logout'))
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+    def test_inactive_user_is_logged_out(self):
+        self.client.login(username='leo', password='pass')
+        self.user.is_active = False
+        self.user.save()
+        response, _ = self.auth_queries()
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_sessions_of_model_backend_stay_logged_in(self):
+        """Сессии, открытые через ModelBackend, переживают переход на
+        кеширующий бэкенд, а новый вход идёт через кеширующий."""
+        self.client.force_login(
+            self.user, backend='django.contrib.auth.backends.ModelBackend')
+        response, _ = self.auth_queries()
+        self.assertEqual(response.context['user'], self.user)
+        self.client.logout()
+        self.client.login(username='leo', password='pass')
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY],
+                         'users.backends.CachedModelBackend')
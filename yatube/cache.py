@@ -0,0 +1,268 @@
+"""Кеш в файле SQLite, общий для всех процессов на машине.
+
+LocMemCache у каждого воркера свой: сдвиг версии в одном процессе не виден
+остальным. Этот бэкенд хранит записи в одном файле (LOCATION) в режиме WAL,
+так что читатели не ждут писателя, а запись из любого процесса сразу видна
+всем.
+
+    incr/decr — UPDATE value = value + delta в транзакции BEGIN IMMEDIATE,
+        атомарно между процессами; целые числа хранятся как INTEGER,
+        остальное — pickle. Выход за 64 бита — ValueError, значение
+        остаётся прежним;
+    MAX_ENTRIES — предел числа записей. Сверх него сначала удаляются
+        просроченные, затем давно не читанные (LRU) — столько, чтобы
+        осталось MAX_ENTRIES - MAX_ENTRIES // CULL_FREQUENCY;
+    ACCESS_RESOLUTION — время последнего чтения обновляется не чаще раза
+        в столько секунд, чтобы чтение почти никогда не было записью;
+        если база занята другим писателем, отметка пропускается, а не
+        ждёт BUSY_TIMEOUT.
+
+Соединение своё у каждого потока и открывается заново после fork."""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# не больше переменных в одном запросе, чем позволяют старые сборки SQLite
+BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires);
+CREATE TABLE IF NOT EXISTS cache_size (entries INTEGER NOT NULL);
+INSERT INTO cache_size SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM cache_size);
+CREATE TRIGGER IF NOT EXISTS cache_inserted AFTER INSERT ON cache
+BEGIN UPDATE cache_size SET entries = entries + 1; END;
+CREATE TRIGGER IF NOT EXISTS cache_deleted AFTER DELETE ON cache
+BEGIN UPDATE cache_size SET entries = entries - 1; END;
+"""
+
+UPSERT = """
+INSERT INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET value = excluded.value,
+    expires = excluded.expires, accessed = excluded.accessed
+"""
+
+
+def _encode(value):
+    # bool — тоже int, но incr по нему Django не разрешает
+    if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _decode(value):
+    return value if isinstance(value, int) else pickle.loads(value)
+
+
+def _batches(names):
+    for start in range(0, len(names), BATCH_SIZE):
+        yield names[start:start + BATCH_SIZE]
+
+
+def _alive(expires, now):
+    return expires is None or expires > now
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        options = params.get('OPTIONS', {})
+        self.busy_timeout = options.get('BUSY_TIMEOUT', 5)
+        self.access_resolution = options.get('ACCESS_RESOLUTION', 1)
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            # соединение родителя после fork использовать нельзя
+            local.db = self._connect()
+            local.pid = os.getpid()
+        return local.db
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=self.busy_timeout,
+                             isolation_level=None, check_same_thread=False)
+        db.execute('PRAGMA journal_mode = wal')
+        db.execute('PRAGMA synchronous = normal')
+        # несколько процессов могут создавать схему одновременно
+        db.executescript(f'BEGIN IMMEDIATE; {SCHEMA} COMMIT;')
+        return db
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _write(self, statements):
+        """Выполняет [(sql, params), ...] одной транзакцией с блокировкой
+        записи с самого начала. Для каждой инструкции возвращает строки
+        (SELECT) или число изменённых строк."""
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            results = []
+            for sql, params in statements:
+                cursor = db.execute(sql, params)
+                results.append(cursor.fetchall() if cursor.description
+                               else cursor.rowcount)
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return results
+
+    def _cull_statements(self, now):
+        """Удаление просроченных и LRU-вытеснение, если записей больше
+        MAX_ENTRIES. Пустые DELETE дёшевы: хватает индексов и счётчика."""
+        keep = self._max_entries - self._max_entries // self._cull_frequency
+        over = 'SELECT entries FROM cache_size WHERE entries > ?'
+        return [
+            (f'DELETE FROM cache WHERE EXISTS ({over}) AND expires <= ?',
+             (self._max_entries, now)),
+            (f'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+             f'ORDER BY accessed LIMIT max(0, coalesce(({over}), 0) - ?))',
+             (self._max_entries, keep)),
+        ]
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        # существующую запись заменяет, только если она просрочена
+        inserted, *_ = self._write([
+            (UPSERT + ' WHERE cache.expires <= ?',
+             (key, _encode(value), self.get_backend_timeout(timeout), now,
+              now)),
+            *self._cull_statements(now),
+        ])
+        return inserted > 0
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        row = self._db.execute(
+            'SELECT value, expires, accessed FROM cache WHERE key = ?',
+            (key,)).fetchone()
+        if row is None or not _alive(row[1], now):
+            return default
+        if now - row[2] >= self.access_resolution:
+            self._touch_accessed([key], now)
+        return _decode(row[0])
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        now = time.time()
+        found, stale = {}, []
+        for batch in _batches(list(keys)):
+            rows = self._db.execute(
+                'SELECT key, value, expires, accessed FROM cache '
+                f'WHERE key IN ({", ".join("?" * len(batch))})', batch)
+            for name, value, expires, accessed in rows:
+                if not _alive(expires, now):
+                    continue
+                found[keys[name]] = _decode(value)
+                if now - accessed >= self.access_resolution:
+                    stale.append(name)
+        if stale:
+            self._touch_accessed(stale, now)
+        return found
+
+    def _touch_accessed(self, names, now):
+        db = self._db
+        # чтение не должно ждать чужую запись ради порядка вытеснения
+        db.execute('PRAGMA busy_timeout = 0')
+        try:
+            for batch in _batches(names):
+                db.execute(
+                    'UPDATE cache SET accessed = ? '
+                    f'WHERE key IN ({", ".join("?" * len(batch))})',
+                    [now, *batch])
+        except sqlite3.OperationalError:
+            # база занята: отметка подождёт следующего чтения
+            pass
+        finally:
+            db.execute(
+                f'PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}')
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        self._write([
+            (UPSERT, (key, _encode(value), self.get_backend_timeout(timeout),
+                      now)),
+            *self._cull_statements(now),
+        ])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        self._write([
+            (UPSERT, (self._key(key, version), _encode(value), expires, now))
+            for key, value in data.items()
+        ] + self._cull_statements(now))
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        cursor = self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, now))
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        name = self._key(key, version)
+        now = time.time()
+        # при переполнении SQLite молча переходит к REAL: такую сумму
+        # не записываем
+        updated, rows = self._write([
+            ("UPDATE cache SET value = value + ? WHERE key = ? "
+             "AND typeof(value) = 'integer' "
+             "AND typeof(value + ?) = 'integer' "
+             "AND (expires IS NULL OR expires > ?)",
+             (delta, name, delta, now)),
+            ('SELECT value, expires FROM cache WHERE key = ?', (name,)),
+        ])
+        if not updated:
+            if rows and type(rows[0][0]) is int and _alive(rows[0][1], now):
+                raise ValueError(f"Key '{key}' would overflow")
+            raise ValueError(f"Key '{key}' not found")
+        return rows[0][0]
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        row = self._db.execute(
+            'SELECT expires FROM cache WHERE key = ?', (key,)).fetchone()
+        return row is not None and _alive(row[0], time.time())
+
+    def delete(self, key, version=None):
+        self._db.execute('DELETE FROM cache WHERE key = ?',
+                         (self._key(key, version),))
+
+    def delete_many(self, keys, version=None):
+        names = [self._key(key, version) for key in keys]
+        self._write([
+            (f'DELETE FROM cache WHERE key IN ({", ".join("?" * len(batch))})',
+             batch)
+            for batch in _batches(names)
+        ])
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # соединение живёт весь процесс: открывать файл на каждый запрос
+        # дороже, чем держать
+        pass
@@ -0,0 +1,225 @@
+"""Замеры запросов: Server-Timing и /metrics в формате Prometheus.
+
+Включаются настройкой METRICS_ENABLED. Когда она выключена, middleware
+снимает себя из цепочки (MiddlewareNotUsed) и ничего не подменяет.
+Гистограммы живут в памяти процесса: каждый воркер отдаёт свои."""
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+from django.template.base import Template
+
+# границы корзин: секунды для времени, штуки для числа запросов
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+HISTOGRAMS = (
+    ('yatube_request_duration_seconds', 'Полное время ответа',
+     'total', TIME_BUCKETS),
+    ('yatube_request_db_duration_seconds', 'Время SQL-запросов',
+     'db_time', TIME_BUCKETS),
+    ('yatube_request_template_duration_seconds', 'Время рендера шаблонов',
+     'template_time', TIME_BUCKETS),
+    ('yatube_request_db_queries', 'Число SQL-запросов',
+     'queries', QUERY_BUCKETS),
+)
+
+_state = threading.local()
+_lock = threading.Lock()
+_installed = False
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.total += 1
+        self.sum += value
+
+
+class Registry:
+    def __init__(self):
+        self.histograms = {}
+        self.cache = {}
+
+    def observe(self, view, sample):
+        with _lock:
+            for name, _, field, buckets in HISTOGRAMS:
+                key = (name, view)
+                if key not in self.histograms:
+                    self.histograms[key] = Histogram(buckets)
+                self.histograms[key].observe(sample[field])
+            for result in ('hit', 'miss'):
+                key = (view, result)
+                self.cache[key] = self.cache.get(key, 0) + sample[result]
+
+    def render(self):
+        lines = []
+        with _lock:
+            for name, help_text, _, buckets in HISTOGRAMS:
+                lines += [f'# HELP {name} {help_text}',
+                          f'# TYPE {name} histogram']
+                for (metric, view), histogram in sorted(
+                        self.histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{view="{view}",'
+                                     f'le="{bound}"}} {cumulative}')
+                    lines += [
+                        f'{name}_bucket{{view="{view}",le="+Inf"}} '
+                        f'{histogram.total}',
+                        f'{name}_sum{{view="{view}"}} {histogram.sum}',
+                        f'{name}_count{{view="{view}"}} {histogram.total}',
+                    ]
+            name = 'yatube_cache_requests_total'
+            lines += [f'# HELP {name} Обращения к кешу',
+                      f'# TYPE {name} counter']
+            for (view, result), count in sorted(self.cache.items()):
+                lines.append(
+                    f'{name}{{view="{view}",result="{result}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class QueryCounter:
+    """execute_wrapper, который считает SQL-запросы соединения."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _sample():
+    return getattr(_state, 'sample', None)
+
+
+def _execute(execute, sql, params, many, context):
+    sample = _sample()
+    if sample is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample['db_time'] += time.perf_counter() - start
+        sample['queries'] += 1
+
+
+def _timed_render(render):
+    def wrapper(self, context):
+        sample = _sample()
+        # вложенные {% include %} уже входят во время внешнего шаблона
+        if sample is None or sample['rendering']:
+            return render(self, context)
+        sample['rendering'] = True
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            sample['template_time'] += time.perf_counter() - start
+            sample['rendering'] = False
+    return wrapper
+
+
+def _counted_get(get):
+    missing = object()
+
+    def wrapper(self, key, default=None, version=None):
+        value = get(self, key, missing, version)
+        sample = _sample()
+        if sample is not None:
+            sample['hit' if value is not missing else 'miss'] += 1
+        return default if value is missing else value
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    def wrapper(self, keys, version=None):
+        keys = list(keys)
+        found = get_many(self, keys, version)
+        sample = _sample()
+        if sample is not None:
+            sample['hit'] += len(found)
+            sample['miss'] += len(keys) - len(found)
+        return found
+    return wrapper
+
+
+def _install():
+    """Один раз оборачивает рендер шаблонов и чтение из кешей."""
+    global _installed
+    with _lock:
+        if _installed:
+            return
+        Template.render = _timed_render(Template.render)
+        for backend in {type(caches[alias]) for alias in settings.CACHES}:
+            backend.get = _counted_get(backend.get)
+            # BaseCache.get_many сам зовёт get, иначе ключи посчитаются дважды
+            if backend.get_many is not BaseCache.get_many:
+                backend.get_many = _counted_get_many(backend.get_many)
+        _installed = True
+
+
+def server_timing(sample):
+    return ', '.join((
+        f'db;dur={sample["db_time"] * 1000:.1f};'
+        f'desc="{sample["queries"]} queries"',
+        f'tpl;dur={sample["template_time"] * 1000:.1f}',
+        f'cache;desc="{sample["hit"]} hits, {sample["miss"]} misses"',
+        f'total;dur={sample["total"] * 1000:.1f}',
+    ))
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        _install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample = {'queries': 0, 'db_time': 0, 'template_time': 0,
+                  'hit': 0, 'miss': 0, 'rendering': False}
+        _state.sample = sample
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_execute))
+                response = self.get_response(request)
+        finally:
+            _state.sample = None
+        sample['total'] = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        registry.observe(match.view_name if match else '<unresolved>', sample)
+        response['Server-Timing'] = server_timing(sample)
+        return response
+
+
+def metrics(request):
+    if not getattr(settings, 'METRICS_ENABLED', False):
+        raise Http404
+    return HttpResponse(registry.render(),
+                        content_type='text/plain; version=0.0.4')
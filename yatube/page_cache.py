@@ -0,0 +1,87 @@
+"""Кеш целых страниц для анонимных посетителей без cookie.
+
+Ключ — путь с query string и версии CONTENT и FOLLOWS из posts.caching:
+любое изменение постов, комментариев, групп или подписок сдвигает версию,
+и старые страницы просто перестают находиться. PAGE_CACHE_TIMEOUT — лишь
+страховка для того, что версии не отслеживают (правка профиля в админке).
+
+Кешируются только GET-запросы к PAGE_CACHE_VIEWS без единой cookie и
+ответы 200 без Set-Cookie, не выдавшие CSRF-токен и не изменившие сессию:
+у такого запроса нет пользователя, и страница одна для всех. Страница,
+собранная с реплики, не сохраняется: реплика могла ещё не догнать версию в
+ключе. Заголовок X-Page-Cache: hit или miss; у остальных запросов его нет."""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from posts.caching import CONTENT, FOLLOWS, can_store, get_version
+
+HEADER = 'X-Page-Cache'
+
+
+def page_cache_key(request):
+    versions = [get_version(name) for name in (CONTENT, FOLLOWS)]
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'pages:{path}:{versions[0]}:{versions[1]}'
+
+
+def _cacheable(request):
+    return (request.method == 'GET' and not request.COOKIES
+            and request.resolver_match.view_name
+            in settings.PAGE_CACHE_VIEWS)
+
+
+def _personal(request):
+    """Cookie, которые поставят уже после сохранения страницы: CSRF-токен,
+    попавший в разметку, и изменённая сессия. session.accessed не годится:
+    его ставит любое чтение request.user, а пустую сессию без cookie
+    SessionMiddleware не сохраняет."""
+    session = getattr(request, 'session', None)
+    return bool(request.META.get('CSRF_COOKIE_USED')
+                or session is not None and session.modified)
+
+
+class PageCacheMiddleware:
+    def __init__(self, get_response):
+        if not settings.PAGE_CACHE_VIEWS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        key = getattr(request, '_page_cache_key', None)
+        if key is None:
+            return response
+        response[HEADER] = 'miss'
+        if (response.status_code == 200 and not response.cookies
+                and not _personal(request) and can_store()):
+            if callable(getattr(response, 'render', None)):
+                response.add_post_render_callback(
+                    lambda rendered: self.store(key, rendered))
+            else:
+                self.store(key, response)
+        return response
+
+    def store(self, key, response):
+        cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not _cacheable(request):
+            return None
+        key = page_cache_key(request)
+        response = cache.get(key)
+        if response is None:
+            request._page_cache_key = key
+            return None
+        # страница уже у клиента: 304 без тела, как ответил бы сам view
+        response = get_conditional_response(
+            request, etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified', '')),
+            response=response)
+        response[HEADER] = 'hit'
+        return response
@@ -0,0 +1,87 @@
+"""Чтение лент с реплик, запись и всё остальное — в основную базу.
+
+DATABASE_REPLICAS — алиасы из DATABASES, которые только читаются (пусто —
+роутер ничего не меняет, middleware снимает себя из цепочки).
+DATABASE_REPLICA_VIEWS — имена представлений, чьи GET/HEAD-запросы читают с
+реплики: одну случайную на весь запрос, чтобы страница была согласованной.
+
+Реплика отстаёт. Ответ, во время которого что-то записали в основную базу,
+ставит cookie на DATABASE_REPLICA_PIN_SECONDS: пока она жива, этот клиент
+читает только из основной базы и видит свой пост или комментарий сразу после
+редиректа. Поэтому же ответ с реплики не сохраняет в кеш ничего, что
+помечено текущей версией данных (posts.caching.can_store): версию сдвинула
+запись в основной базе, а до реплики она ещё не дошла."""
+import random
+import threading
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'db_primary'
+
+_state = threading.local()
+
+
+def _replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def reading_replica():
+    """Читает ли текущий запрос с реплики."""
+    return getattr(_state, 'replica', None) is not None
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # сессию пишут в том же запросе, где она нужна: отставшая реплика
+        # разлогинила бы пользователя
+        if model._meta.app_label == 'sessions':
+            return DEFAULT_DB_ALIAS
+        return getattr(_state, 'replica', None)
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # в репликах те же строки, что и в основной базе
+        databases = {DEFAULT_DB_ALIAS, *_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # схема приходит на реплику вместе с данными
+        if db in _replicas():
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        if not _replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.replica = None
+        _state.wrote = False
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = _state.wrote
+            _state.replica = None
+            _state.wrote = False
+        if wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1', httponly=True, samesite='Lax',
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (request.method in ('GET', 'HEAD')
+                and PIN_COOKIE not in request.COOKIES
+                and request.resolver_match.view_name
+                in settings.DATABASE_REPLICA_VIEWS):
+            _state.replica = random.choice(_replicas())
@@ -36,9 +36,10 @@ ALLOWED_HOSTS = [
 # Application definition
 
 INSTALLED_APPS = [
-    'users',
-    'posts',
+    'users.apps.UsersConfig',
+    'posts.apps.PostsConfig',
     'about',
+    'api',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -49,6 +50,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.metrics.MetricsMiddleware',
+    # снаружи сессий: сохранение сессии после логина тоже запись
+    'yatube.routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,16 +60,27 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # последним: в кеш попадает ответ view, заголовки остальных middleware
+    # добавляются и к попаданию
+    'yatube.page_cache.PageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+template_loaders = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# вне DEBUG шаблоны разбираются один раз на процесс
+if not DEBUG:
+    template_loaders = [
+        ('django.template.loaders.cached.Loader', template_loaders)]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': template_loaders,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -84,11 +99,53 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # штатный sqlite3 + PRAGMA и BEGIN IMMEDIATE, см. yatube/sqlite3/base.py
+        'ENGINE': 'yatube.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # соединение переживает запрос, PRAGMA не повторяются на каждом
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'pragmas': {
+                # ждать чужую запись до 5 секунд вместо "database is locked"
+                'busy_timeout': 5000,
+                # читатели не блокируют писателя и наоборот
+                'journal_mode': 'wal',
+                # в WAL fsync только на контрольных точках
+                'synchronous': 'normal',
+                'mmap_size': 256 * 1024 * 1024,
+                # отрицательное значение — в КиБ: 64 МиБ страничного кеша
+                'cache_size': -64 * 1024,
+            },
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Реплики только для чтения, см. yatube/routers.py. Для проверки локально
+# подойдёт второй файл SQLite, который наполняет manage.py sync_replicas:
+# DATABASES['replica'] = {
+#     **DATABASES['default'],
+#     'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+#     # в тестах реплика смотрит в тестовую основную базу
+#     'TEST': {'MIRROR': 'default'},
+# }
+# DATABASE_REPLICAS = ['replica']
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['yatube.routers.PrimaryReplicaRouter']
+# ленты, профиль и страница поста: только читают
+DATABASE_REPLICA_VIEWS = [
+    'posts:index',
+    'posts:group_posts',
+    'posts:follow_index',
+    'posts:search',
+    'posts:trending',
+    'posts:profile',
+    'posts:post',
+]
+# сколько секунд после записи клиент читает из основной базы: больше
+# ожидаемого отставания реплики
+DATABASE_REPLICA_PIN_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -142,8 +199,75 @@ EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 
+# сессия читается из кеша, база — только при промахе; анонимный запрос без
+# cookie сессии хранилище не трогает вовсе
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# пользователь из сессии тоже берётся из кеша, см. users/backends.py;
+# ModelBackend остаётся для сессий, открытых до кеширующего бэкенда: без
+# него в списке их владельцев бы разлогинило
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+# сколько секунд живёт закешированный пользователь; сохранение и выход
+# сбрасывают его сразу
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# сколько последних постов хранится в ленте подписок каждого пользователя
+POSTS_TIMELINE_LENGTH = 1000
+
+# фрагменты ленты подписок сбрасываются по версии, таймаут лишь страховка
+POSTS_FEED_CACHE_TIMEOUT = 60 * 60 * 24
+# то же для главной: версия сдвигается при любом изменении постов,
+# комментариев и групп
+POSTS_INDEX_CACHE_TIMEOUT = 60 * 60 * 24
+
+# страницы, которые анонимам без cookie отдаются целиком из кеша,
+# см. yatube/page_cache.py; пусто — кеш выключен
+PAGE_CACHE_VIEWS = [
+    'posts:index',
+    'posts:group_posts',
+    'posts:profile',
+    'posts:post',
+    'about:author',
+    'about:tech',
+]
+# страницы сбрасываются по версиям; таймаут — для правок профиля, которые
+# версии не сдвигают
+PAGE_CACHE_TIMEOUT = 10 * 60
+
+# на сколько секунд админка запоминает число строк в списках
+ADMIN_COUNT_CACHE_TIMEOUT = 5 * 60
+
+# популярность поста вдвое падает за это число секунд без новых комментариев
+POSTS_TRENDING_HALF_LIFE = 6 * 60 * 60
+# сколько постов на странице «Популярное»
+POSTS_TRENDING_SIZE = 20
+
+# потоки, в которых после загрузки создаются миниатюры картинок постов;
+# 0 — создавать сразу после коммита в потоке запроса (так в тестах)
+POSTS_THUMBNAIL_WORKERS = 2
+
+# заголовок Server-Timing и гистограммы на /metrics; выключенный
+# middleware сам убирает себя из цепочки
+METRICS_ENABLED = False
+
+
+# manage.py test подменяет часть настроек, см. yatube/testing.py
+TEST_RUNNER = 'yatube.testing.TestRunner'
+
+
+# один файл на всех воркеров: сброс версии в одном процессе сразу виден
+# остальным, см. yatube/cache.py
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'yatube.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            # сверх этого вытесняются давно не читанные записи
+            'MAX_ENTRIES': 100000,
+            # по 10% за раз, чтобы не чистить на каждой записи
+            'CULL_FREQUENCY': 10,
+        },
     }
 }
@@ -0,0 +1,35 @@
+"""SQLite для продакшена: PRAGMA при открытии соединения и BEGIN IMMEDIATE.
+
+Настраивается через DATABASES[...]['OPTIONS']:
+    pragmas — словарь PRAGMA, выполняются по порядку на каждом новом
+        соединении (с CONN_MAX_AGE это раз в жизнь соединения);
+    transaction_mode — 'IMMEDIATE' берёт блокировку записи в начале
+        transaction.atomic(). В режиме DEFERRED транзакция, которая сначала
+        читала, а потом пишет, получает "database is locked" сразу, не дожидаясь
+        busy_timeout. Для базы в памяти (тесты) не используется: там общий
+        кеш с табличными блокировками, и ранняя блокировка всей базы только
+        мешает фоновым потокам.
+Остальные OPTIONS уходят в sqlite3.connect, как у штатного бэкенда."""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        options = self.settings_dict['OPTIONS']
+        for pragma, value in options.get('pragmas', {}).items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        if mode and not self.is_in_memory_db():
+            self.cursor().execute(f'BEGIN {mode}')
+        else:
+            self.cursor().execute('BEGIN')
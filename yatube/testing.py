@@ -0,0 +1,39 @@
+"""Настройки, которые тесты подменяют поверх yatube/settings.py.
+
+Их применяют и manage.py test (TestRunner, TEST_RUNNER в настройках),
+и pytest (conftest.py в корне проекта).
+
+    POSTS_THUMBNAIL_WORKERS = 0 — миниатюры создаются в потоке теста:
+        фоновый поток писал бы в общую базу в памяти, а она блокирует
+        таблицы без ожидания busy_timeout;
+    CACHES — тот же SQLiteCache, но в файле во временном каталоге:
+        cache.clear() в тестах не должен стирать кеш запущенного сайта."""
+import copy
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def overrides(directory):
+    """Подмены; файлы тестов (кеш) создаются в directory."""
+    caches = copy.deepcopy(settings.CACHES)
+    caches['default']['LOCATION'] = os.path.join(directory, 'cache.sqlite3')
+    return {'POSTS_THUMBNAIL_WORKERS': 0, 'CACHES': caches}
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._test_directory = tempfile.mkdtemp()
+        self._test_settings = override_settings(
+            **overrides(self._test_directory))
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        shutil.rmtree(self._test_directory, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
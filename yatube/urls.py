@@ -4,6 +4,8 @@ from django.conf.urls import handler404, handler500
 from django.conf import settings
 from django.conf.urls.static import static
 
+from yatube.metrics import metrics
+
 handler404 = "posts.views.page_not_found"  # noqa
 handler500 = "posts.views.server_error"  # noqa
 
@@ -11,6 +13,8 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path("auth/", include("django.contrib.auth.urls")),
     path('admin/', admin.site.urls),
+    path('metrics', metrics, name='metrics'),
+    path('api/v1/', include('api.urls', namespace='api')),
     path('', include("posts.urls", namespace='posts')),
     path('about/', include('about.urls', namespace='about')),
 ]